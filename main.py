@@ -9,9 +9,10 @@ import logging
 
 # --- 1. Configure Logging ---
 # Set up global logging configuration for the entire application.
-# Messages will be shown from the DEBUG level and up.
+# Messages will be shown from the INFO level and up; DEBUG-level formatting
+# is skipped entirely, which matters on log-heavy simulation runs.
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
@@ -35,10 +36,12 @@ def main():
     # Initialize the engine with the rules from the config file.
     engine = IAQLogicEngine(config)
     # Run the simulation using the clean data and get the results.
-    event_log, detailed_log = engine.run_simulation(processed_data)
+    _, detailed_log = engine.run_simulation(processed_data)
     # --- 5. Reporting Phase ---
-    # The results from the simulation are in the 'event_log' and 'detailed_log' variables.
-    generate_event_reports(event_log, reports_path, run_timestamp)
+    # The event report takes the engine's columnar frame directly, skipping
+    # the record-dict round trip; only the detailed log is consumed from the
+    # return value.
+    generate_event_reports(engine.event_log_frame(), reports_path, run_timestamp)
     generate_detailed_simulation_log(detailed_log, reports_path, run_timestamp)
 
 if __name__ == "__main__":
@@ -1,14 +1,61 @@
 # Import Libraries
+from functools import lru_cache
 from pathlib import Path
+import copy
+import json
+import os
 import yaml
 
 # Define a constant path to the configuration file.
 # `__file__` is the current file, `.parent.parent` goes up two directories to the project root.
 CONFIG_PATH = Path(__file__).parent.parent / 'config.yaml'
 
+# Prefer the libyaml C backend when available; it parses the same documents
+# several times faster than the pure-Python loader.
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+@lru_cache(maxsize=8)
+def _load_cached(path_str: str, mtime: float, size: int) -> dict:
+    """
+    Opens and parses the YAML file. The (mtime, size) arguments are part of the
+    cache key so that an edited config file invalidates the memoized entry.
+    A pre-compiled JSON artifact next to the YAML file is preferred on cold
+    starts (json decodes far faster than YAML parses); it is rewritten
+    whenever the YAML file is newer.
+
+    Args:
+        path_str (str): The resolved path to the YAML configuration file.
+        mtime (float): The file's last-modification time.
+        size (int): The file's size in bytes.
+
+    Returns:
+        dict: The configuration loaded as a Python dictionary.
+    """
+    compiled_path = Path(path_str + '.cache.json')
+    try:
+        if compiled_path.stat().st_mtime >= mtime:
+            with open(compiled_path, 'r') as file:
+                return json.load(file)
+    except (OSError, ValueError):
+        pass
+    with open(path_str, 'r') as file:
+        config = yaml.load(file, Loader=_YAML_LOADER)
+    # Best effort: a read-only location or non-JSON-serializable values just
+    # mean the next cold start parses YAML again.
+    try:
+        compiled_path.write_text(json.dumps(config))
+    except (OSError, TypeError, ValueError):
+        pass
+    return config
+
 def load_config(config_path: Path = CONFIG_PATH) -> dict:
     """
     Loads, parses, and returns the YAML configuration file.
+    Repeated calls for an unchanged file return a cached dictionary instead of
+    re-reading and re-parsing it from disk.
 
     Args:
         config_path (Path): The path to the YAML configuration file.
@@ -16,6 +63,7 @@ def load_config(config_path: Path = CONFIG_PATH) -> dict:
     Returns:
         dict: The configuration loaded as a Python dictionary.
     """
-    with open(config_path, 'r') as file:
-        config = yaml.safe_load(file)
-    return config
\ No newline at end of file
+    stat = os.stat(config_path)
+    config = _load_cached(str(Path(config_path).resolve()), stat.st_mtime, stat.st_size)
+    # Hand each caller its own copy so mutations cannot poison the cache.
+    return copy.deepcopy(config)
@@ -1,42 +1,122 @@
 # Import Libraries
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from src.config import load_config
 import logging
 import polars as pl
-import requests
 import sys
 
+# orjson decodes bytes straight to Python objects in a single C pass; fall
+# back to the response's stdlib-json decoding when it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Initialization
 logger = logging.getLogger(__name__)
 DATETIME_COL = "datetime"
+DATETIME_FMT = "%Y-%m-%d %H:%M:%S%.f"
 ID_VARS = ["epoch", DATETIME_COL, "year", "month", "day"]
+# Column-name patterns for the tidying regexes, hoisted so the extract
+# expressions are built once at import instead of on every call.
+_SENSOR_PREFIX = "idp_iaq_l19_"
+_VAV_PREFIX = "sne22_2_vav_l19_z1_sa_"
+_SENSOR_RE = r"idp_iaq_l19_(?<sensor_id>[^_]+)_(?<metric>.*)"
+_VAV_RE = r"sne22_2_vav_l19_z1_sa_(?<vav_id>[^_]+)_(?<metric>.*)"
+_SENSOR_EXTRACT = pl.col("variable").str.extract_groups(_SENSOR_RE)
+_VAV_EXTRACT = pl.col("variable").str.extract_groups(_VAV_RE)
 
-def _read_data_file(base_path: Path) -> pl.DataFrame:
+def _parse_datetime_col(lf: pl.LazyFrame) -> pl.LazyFrame:
     """
-    Helper function to read a data file. It prioritizes the Parquet format.
-    It will try to read a .parquet file first, and falls back to .csv if not found.
+    Converts the datetime column from string to a proper Datetime dtype once at
+    ingest. Files without the column (or with an already-typed column, e.g.
+    Parquet) are returned unchanged.
+
+    Args:
+        lf (pl.LazyFrame): The freshly scanned data file.
+
+    Returns:
+        pl.LazyFrame: The frame with a typed datetime column where applicable.
+    """
+    schema = lf.collect_schema()
+    if DATETIME_COL in schema and schema[DATETIME_COL] == pl.String:
+        return lf.with_columns(pl.col(DATETIME_COL).str.to_datetime(DATETIME_FMT))
+    return lf
+
+def _read_data_file(base_path: Path) -> pl.LazyFrame:
+    """
+    Helper function to scan a data file lazily. It prioritizes the Parquet format.
+    It will try to scan a .parquet file first, and falls back to .csv if not found.
+    No data is read until the surrounding pipeline is collected, which lets Polars
+    push projections and predicates down into the file reader.
 
     Args:
         base_path (Path): The path to the file without its extension.
 
     Returns:
-        pl.DataFrame: The loaded data as a Polars DataFrame.
+        pl.LazyFrame: The scanned data as a Polars LazyFrame.
     """
     parquet_path = base_path.with_suffix('.parquet')
     csv_path = base_path.with_suffix('.csv')
     if parquet_path.exists():
-        logger.info(f"Reading Parquet file: {parquet_path}")
-        return pl.read_parquet(parquet_path)
+        logger.info(f"Scanning Parquet file: {parquet_path}")
+        return _parse_datetime_col(pl.scan_parquet(parquet_path, low_memory=True))
     elif csv_path.exists():
-        logger.info(f"Reading CSV file: {csv_path}")
-        cols = pl.read_csv(csv_path, n_rows=0, infer_schema_length=0).columns
+        logger.info(f"Scanning CSV file: {csv_path}")
+        # collect_schema on an untyped scan reads only the header, replacing
+        # the previous eager read_csv(n_rows=0) round trip.
+        cols = pl.scan_csv(csv_path, infer_schema_length=0).collect_schema().names()
         overrides = {col: pl.Float64 for col in cols if col not in ID_VARS}
-        return pl.read_csv(csv_path, schema_overrides=overrides)
+        df = _parse_datetime_col(pl.scan_csv(csv_path, schema_overrides=overrides, low_memory=True)).collect(engine="streaming")
+        # One-shot conversion so every subsequent run takes the Parquet fast
+        # path; failure to write (e.g. read-only dir) just means the next run
+        # parses CSV again.
+        try:
+            df.write_parquet(parquet_path, compression="snappy", statistics=True)
+            logger.info(f"Wrote Parquet copy: {parquet_path}")
+        except OSError as error:
+            logger.warning(f"Could not write Parquet copy for {csv_path}: {error}")
+        return df.lazy()
     else:
         logger.error(f"No .parquet or .csv file found for base path: {base_path}")
         sys.exit(1)
 
+def _sorted_by_datetime(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Returns the frame ordered by datetime, skipping the O(n log n) sort when
+    the column is already monotonic (the usual case for append-only logs) and
+    marking it sorted so downstream operations can use the fast paths.
+
+    Args:
+        df (pl.DataFrame): The frame to order.
+
+    Returns:
+        pl.DataFrame: The frame sorted by datetime with the sorted flag set.
+    """
+    if not df.get_column(DATETIME_COL).is_sorted():
+        df = df.sort(DATETIME_COL)
+    return df.with_columns(pl.col(DATETIME_COL).set_sorted())
+
+def _wide_from_tidy(tidy_df: pl.DataFrame, index_cols: list[str], metrics: list[str]) -> pl.DataFrame:
+    """
+    Materializes a tidy (long) frame into wide format with one column per
+    metric. Unlike a generic pivot, the metric set is supplied by the caller,
+    so no extra scan is needed to discover the output schema.
+
+    Args:
+        tidy_df (pl.DataFrame): A tidy frame with 'metric' and 'value' columns.
+        index_cols (list[str]): The columns identifying each output row.
+        metrics (list[str]): The metric names to emit as columns.
+
+    Returns:
+        pl.DataFrame: The wide-format frame.
+    """
+    return tidy_df.group_by(index_cols, maintain_order=True).agg([
+        pl.col("value").filter(pl.col("metric") == m).first().alias(m)
+        for m in metrics
+    ])
+
 def load_and_process_data(data_dir: Path, config: dict) -> dict[str, pl.DataFrame]:
     """
     Loads all local data files, merges them, and transforms them into a tidy format.
@@ -53,49 +133,116 @@ def load_and_process_data(data_dir: Path, config: dict) -> dict[str, pl.DataFram
     if not file_map:
         logger.error("'data_files' section not found in config.yaml. Cannot proceed.")
         sys.exit(1)
-    sensor_df_1 = _read_data_file(data_dir / file_map["sensor_1"])
-    sensor_df_2 = _read_data_file(data_dir / file_map["sensor_2"])
-    ahu_df = _read_data_file(data_dir / file_map["ahu"])
-    vav_df = _read_data_file(data_dir / file_map["vav"])
+    # The four files are independent, so their scans (existence checks plus
+    # header reads) run on a small thread pool; Polars releases the GIL during
+    # decode, and the heavy work is deferred to the collect calls below.
+    paths = {key: data_dir / file_map[key] for key in ("sensor_1", "sensor_2", "ahu", "vav")}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        scans = dict(zip(paths, executor.map(_read_data_file, paths.values())))
+    sensor_lf_1 = scans["sensor_1"]
+    sensor_lf_2 = scans["sensor_2"]
+    ahu_lf = scans["ahu"]
+    vav_lf = scans["vav"]
     logger.info("Reshaping sensor and VAV data into tidy format...")
-    combined_sensor_df = sensor_df_1.join(sensor_df_2, on=ID_VARS, how="inner")
-    sensor_long = combined_sensor_df.unpivot(index=ID_VARS, variable_name="variable", value_name="value")
-    sensor_tidy = sensor_long.with_columns([
-        pl.col("variable").str.extract(r"idp_iaq_l19_([^_]+)_(.*)", 1).alias("sensor_id"),
-        pl.col("variable").str.extract(r"idp_iaq_l19_([^_]+)_(.*)", 2).alias("metric")
-    ]).drop("variable").drop_nulls()
-    iaq_df = sensor_tidy.pivot(index=[DATETIME_COL, "sensor_id"], on="metric", values="value")
-    vav_long = vav_df.unpivot(index=ID_VARS, variable_name="variable", value_name="value")
-    vav_tidy = vav_long.with_columns([
-        pl.col("variable").str.extract(r"sne22_2_vav_l19_z1_sa_([^_]+)_(.*)", 1).alias("vav_id"),
-        pl.col("variable").str.extract(r"sne22_2_vav_l19_z1_sa_[^_]+_(.*)", 1).alias("metric")
-    ]).drop("variable").drop_nulls()
-    vav_df_tidy = vav_tidy.pivot(index=[DATETIME_COL, "vav_id"], on="metric", values="value")
-    logger.info("Finalizing and converting data types...")
-    main_df = ahu_df.with_columns(pl.col(DATETIME_COL).str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-    iaq_df = iaq_df.with_columns(pl.col(DATETIME_COL).str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-    vav_df_tidy = vav_df_tidy.with_columns(pl.col(DATETIME_COL).str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
+    # datetime uniquely identifies a row in the raw files (epoch does not, it
+    # repeats), so joining on it alone gives the same pairing as the full
+    # 5-key join while hashing a single typed column instead of the whole ID
+    # set. The redundant ID columns are dropped from the right side so the
+    # joined frame keeps one copy.
+    combined_sensor_lf = sensor_lf_1.join(
+        sensor_lf_2.drop([c for c in ID_VARS if c != DATETIME_COL]), on=DATETIME_COL, how="inner"
+    )
+    # Melt only the columns that actually match the sensor/VAV naming scheme,
+    # so the long frames are not inflated by non-matching columns that the
+    # regex would discard anyway.
+    sensor_cols = [c for c in combined_sensor_lf.collect_schema().names() if c.startswith(_SENSOR_PREFIX)]
+    sensor_long = combined_sensor_lf.unpivot(index=ID_VARS, on=sensor_cols, variable_name="variable", value_name="value")
+    sensor_tidy = sensor_long.with_columns(
+        _SENSOR_EXTRACT
+    ).unnest("variable").with_columns(
+        pl.col("sensor_id").cast(pl.Categorical),
+        pl.col("metric").cast(pl.Categorical)
+    )
+    vav_cols = [c for c in vav_lf.collect_schema().names() if c.startswith(_VAV_PREFIX)]
+    vav_long = vav_lf.unpivot(index=ID_VARS, on=vav_cols, variable_name="variable", value_name="value")
+    vav_tidy = vav_long.with_columns(
+        _VAV_EXTRACT
+    ).unnest("variable").with_columns(
+        pl.col("vav_id").cast(pl.Categorical),
+        pl.col("metric").cast(pl.Categorical)
+    )
+    # The three plans are materialized in one collect_all call (shared
+    # scheduling, common-subplan elimination) and the wide materialization
+    # happens once per entity at the tail.
+    sensor_tidy_df, vav_tidy_df, main_df = pl.collect_all([sensor_tidy, vav_tidy, ahu_lf], engine="streaming")
+    # The sensor metric set is known from config, which skips the schema
+    # discovery pass a generic pivot would run; it is only discovered from the
+    # data when the config does not list it. VAV metrics are always discovered.
+    sensor_metrics = config.get("sensor_metrics")
+    if not sensor_metrics:
+        sensor_metrics = sensor_tidy_df["metric"].unique(maintain_order=True).to_list()
+    iaq_df = _wide_from_tidy(sensor_tidy_df, [DATETIME_COL, "sensor_id"], sensor_metrics)
+    vav_metrics = vav_tidy_df["metric"].unique(maintain_order=True).to_list()
+    vav_df_tidy = _wide_from_tidy(vav_tidy_df, [DATETIME_COL, "vav_id"], vav_metrics)
     logger.info("Data ingestion and processing complete.")
     return {
-        "iaq": iaq_df.sort(DATETIME_COL),
-        "vav": vav_df_tidy.sort(DATETIME_COL),
-        "ahu": main_df.sort(DATETIME_COL)
+        "iaq": _sorted_by_datetime(iaq_df),
+        "vav": _sorted_by_datetime(vav_df_tidy),
+        "ahu": _sorted_by_datetime(main_df)
     }
 
-def fetch_psi_data(date: datetime | None = None) -> pl.DataFrame:
+# Shared HTTP session so repeated PSI polls reuse pooled connections instead
+# of paying a fresh TCP+TLS handshake per call. Created lazily to keep the
+# requests import off the startup path.
+_session = None
+
+def _get_session():
+    """
+    Returns the module-wide HTTP session, creating it on first use with a
+    small connection pool mounted for both schemes.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+def _decode_json(response) -> dict:
+    """
+    Decodes an HTTP response body as JSON, preferring orjson when available.
+
+    Args:
+        response: A requests-style response object.
+
+    Returns:
+        dict: The decoded JSON payload.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def fetch_psi_data(psi_url: str, date: datetime | None = None) -> pl.DataFrame:
     """
     Fetches PSI data from the data.gov.sg API for a specific date.
     If no date is provided, it fetches the latest available data.
 
     Args:
+        psi_url (str): The PSI API endpoint from the loaded configuration.
         date (datetime | None): The date for which to fetch PSI data. Defaults to None.
 
     Returns:
         pl.DataFrame: A DataFrame containing the parsed PSI data, or an empty DataFrame on failure.
     """
-    config = load_config()
-    api_config = config.get("api_urls", {})
-    psi_url = api_config.get("psi")
+    # Imported lazily so runs that never touch the PSI API skip loading
+    # requests and its urllib3/ssl/certifi chain at startup.
+    import requests
     if not psi_url:
         logger.error("PSI API URL not found in configuration.")
         return pl.DataFrame()
@@ -106,23 +253,33 @@ def fetch_psi_data(date: datetime | None = None) -> pl.DataFrame:
     else:
         logger.info("Fetching latest PSI data.")
     try:
-        response = requests.get(psi_url, params=params)
+        # The timeout keeps a hung API server from stalling the simulation.
+        response = _get_session().get(psi_url, params=params, timeout=5)
         if response.status_code != 200:
-            error_data = response.json()
+            error_data = _decode_json(response)
             error_msg = error_data.get("errorMsg", "Unknown API error")
             logger.error(f"API returned status {response.status_code}: {error_msg}")
             return pl.DataFrame()
-        data = response.json()
+        data = _decode_json(response)
         logger.debug(f"Full API Response JSON: {data}")
         items = data.get("data", {}).get("items", [{}])[0]
         readings = items.get("readings", {})
-        flat_readings = [{"metric": metric, **values} for metric, values in readings.items()]
-        if not flat_readings:
+        if not readings:
             logger.warning("PSI data could be parsed but contains no readings.")
             return pl.DataFrame()
-        psi_df = pl.DataFrame(flat_readings)
+        # Build the frame column-by-column (one list per region) instead of
+        # merging a dict per metric row; Polars ingests the lists directly.
+        metrics = list(readings.keys())
+        regions = list(next(iter(readings.values())).keys())
+        columns = {"metric": metrics}
+        for region in regions:
+            columns[region] = [readings[metric].get(region) for metric in metrics]
+        psi_df = pl.DataFrame(columns)
         logger.info("PSI data fetched successfully.")
         return psi_df
-    except requests.exceptions.RequestException as error:
+    except (requests.exceptions.RequestException, ValueError) as error:
+        # ValueError covers JSON decode failures from both orjson and the
+        # stdlib path (e.g. an HTML error page from a gateway), keeping the
+        # empty-DataFrame-on-failure contract.
         logger.error(f"Error during API request: {error}")
         return pl.DataFrame()
\ No newline at end of file
@@ -1,76 +1,259 @@
 # Import Libraries
 from datetime import timedelta
+from functools import lru_cache
 from src.data_ingestion import fetch_psi_data
+from typing import NamedTuple
 import logging
+import operator
 import polars as pl
 
 # Initialization
 logger = logging.getLogger(__name__)
 
+# Declarative config schema: (path into the config, required keys there, error
+# template). _validate_config walks this table in order, so a missing key
+# raises the same message the hand-rolled checks used to produce.
+_CONFIG_SCHEMA = (
+    ((), ("data_files", "api_urls", "parameters", "defaults", "thresholds", "sensor_to_vav_map", "actions"),
+     "Configuration Error: Section '{key}' is missing from config.yaml"),
+    (("api_urls",), ("psi",),
+     "Configuration Error: 'psi' key is missing from 'api_urls'"),
+    (("parameters",), ("outdoor_co2_ppm",),
+     "Configuration Error: 'outdoor_co2_ppm' is missing from 'parameters'"),
+    (("defaults",), ("sensor_reading_default",),
+     "Configuration Error: 'sensor_reading_default' is missing from 'defaults'"),
+    (("thresholds",), ("triggering", "normalization"),
+     "Configuration Error: 'triggering' or 'normalization' subsection is missing from 'thresholds'"),
+    (("thresholds", "triggering"),
+     ("co2_ppm_above_outdoor", "tvoc_ug_m3", "pm2_5_ug_m3", "pm10_ug_m3", "hcho_ug_m3",
+      "rh_percent_max", "temp_c_min", "temp_c_max", "persistence_minutes",
+      "pad_increase_percent", "max_dilution_cycles"),
+     "Configuration Error: Trigger threshold '{key}' is missing from config.yaml"),
+    (("thresholds", "normalization"),
+     ("co2_ppm_above_outdoor", "tvoc_ug_m3", "pm2_5_ug_m3", "pm10_ug_m3", "hcho_ug_m3", "rh_percent_max"),
+     "Configuration Error: Normalization threshold '{key}' is missing from config.yaml"),
+    (("thresholds",), ("psi",),
+     "Configuration Error: 'psi' subsection is missing from 'thresholds'"),
+    (("thresholds", "psi"), ("unhealthy_min", "unhealthy_max", "very_unhealthy_min"),
+     "Configuration Error: PSI threshold '{key}' is missing from config.yaml"),
+    (("actions",), ("branch_b", "branch_c"),
+     "Configuration Error: 'branch_b' or 'branch_c' is missing from 'actions'"),
+)
+
+# Ticks per second for each Polars datetime time unit; used to express the
+# persistence window in the same integer domain as the timestamp keys.
+_UNIT_PER_SECOND = {"ns": 1_000_000_000, "us": 1_000_000, "ms": 1_000}
+
+# Trigger reasons that indicate a pollutant problem (Branch A) rather than a
+# thermal-comfort one (Branches B/C/D).
+_POLLUTANT_TRIGGERS = frozenset({"co2", "tvoc", "pm2_5", "pm10", "hcho"})
+
+class _BranchSpec(NamedTuple):
+    """
+    Static description of how one VAV control branch (A/B/C) differs from the
+    others. The shared cycle/lookup scaffolding lives in _execute_vav_branch;
+    only the setpoint comparison and log wording vary per branch.
+    """
+    letter: str
+    mode: str
+    limit_col: str
+    in_range: object  # operator comparing current setpoint against limit_col
+    vav_event: str
+    vav_detail: str
+    vav_pct_attr: str
+    fallback_event: str
+    fallback_detail: str
+    fallback_pct_attr: str
+    fail_sets_fired: bool
+
+# Branch A escalates to the PAD/FAD system instead of a CHW valve action, so
+# its fallback fields are None and _execute_vav_branch defers to
+# _escalate_to_pad.
+_BRANCH_SPECS = {
+    "A": _BranchSpec(
+        letter="A", mode="Dilution", limit_col="cmaxflo", in_range=operator.lt,
+        vav_event="VAV Action", vav_detail="VAV '{vav_id}' airflow not at max. Setting to maximum",
+        vav_pct_attr=None, fallback_event=None, fallback_detail=None,
+        fallback_pct_attr=None, fail_sets_fired=True,
+    ),
+    "B": _BranchSpec(
+        letter="B", mode="Cooling", limit_col="cmaxflo", in_range=operator.lt,
+        vav_event="VAV Action (Cooling)", vav_detail="VAV '{vav_id}' not at max. Increasing flow setpoint by {pct}%",
+        vav_pct_attr="_branch_b_vav_inc_pct", fallback_event="CHW Valve Action (Cooling)",
+        fallback_detail="VAV at max. Increasing Chilled Water Valve position by {pct}%",
+        fallback_pct_attr="_branch_b_chw_inc_pct", fail_sets_fired=False,
+    ),
+    "C": _BranchSpec(
+        letter="C", mode="Warming", limit_col="ocmnc_sp", in_range=operator.gt,
+        vav_event="VAV Action (Warming)", vav_detail="VAV '{vav_id}' not at min. Decreasing flow setpoint by {pct}%",
+        vav_pct_attr="_branch_c_vav_dec_pct", fallback_event="CHW Valve Action (Warming)",
+        fallback_detail="VAV at min. Decreasing Chilled Water Valve position by {pct}%",
+        fallback_pct_attr="_branch_c_chw_dec_pct", fail_sets_fired=False,
+    ),
+}
+
+@lru_cache(maxsize=32)
+def _fetch_psi_cached(psi_url: str, date) -> pl.DataFrame:
+    """
+    Memoizes PSI API responses per (url, date) so re-running the simulation in
+    the same process reuses the first fetch instead of repeating the network call.
+    """
+    return fetch_psi_data(psi_url, date=date)
+
+def _psi_central_value(psi_data: pl.DataFrame):
+    """
+    Extracts the 24-hour PSI central reading from an API response frame, or
+    None when the response is empty.
+    """
+    if psi_data.is_empty():
+        return None
+    return psi_data.filter(
+        pl.col("metric") == "psi_twenty_four_hourly"
+    ).select("central").item()
+
+@lru_cache(maxsize=32)
+def _psi_value_for_day(psi_url: str, date):
+    """
+    Returns the 24-hour PSI central reading for the given day, or None when the
+    API response is empty. Memoized so repeated simulations over the same day
+    skip both the fetch and the scalar extraction.
+    """
+    return _psi_central_value(_fetch_psi_cached(psi_url, date))
+
+def _build_reason_lookup(reasons: tuple[str, ...]) -> tuple[tuple[str, ...], ...]:
+    """
+    Builds the mask -> reason-tuple table used by _check_iaq_triggers: entry m
+    holds the names whose bit is set in m, in trigger order.
+    """
+    return tuple(
+        tuple(reason for i, reason in enumerate(reasons) if mask & (1 << i))
+        for mask in range(1 << len(reasons))
+    )
+
+class _SensorState:
+    """
+    Per-sensor alert state for the simulation loop. Slots pin each field to a
+    fixed offset, so the hot loop reads and writes state through attribute
+    access instead of hashing dict keys for every sensor at every timestamp.
+    """
+    __slots__ = ("is_triggered", "alert_start_time", "fire_at", "has_fired", "dilution_cycle_count", "alert_type")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Returns every field to its idle (no alert) value."""
+        self.is_triggered = False
+        self.alert_start_time = None
+        self.fire_at = None
+        self.has_fired = False
+        self.dilution_cycle_count = 0
+        self.alert_type = None
+
 class IAQLogicEngine:
-    def __init__(self, config: dict):
+    # Trigger reasons in the order the scalar checks historically produced them;
+    # reason lists are logged and compared downstream in this order.
+    _TRIGGER_REASONS = ("co2", "tvoc", "pm2_5", "pm10", "hcho", "rh", "temp")
+    _REASON_FLAGS = tuple((f"_r_{reason}", reason) for reason in _TRIGGER_REASONS)
+    # Bitmask -> reason tuple lookup (bit i corresponds to _TRIGGER_REASONS[i]).
+    # _check_iaq_triggers accumulates one bit per threshold and indexes this
+    # table, so the common no-trigger path returns a shared empty tuple with
+    # no list allocation at all.
+    _REASON_LOOKUP = _build_reason_lookup(_TRIGGER_REASONS)
+    # AHU filter status columns read by the BMS alarm check.
+    _PRI_FILT_COL = "sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts"
+    _SEC_FILT_COL = "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts"
+
+    def __init__(self, config: dict, psi_fetcher=None):
         """
         Initializes the logic engine, loads, and validates the configuration.
 
         Args:
             config (dict): The loaded configuration from config.yaml.
+            psi_fetcher (callable, optional): Replacement for fetch_psi_data,
+                mainly for tests. When provided it is called directly and
+                bypasses the module-level PSI caches; when None the cached
+                fetch path is used.
         """
         self.config = config
         self._validate_config()
+        self._psi_fetcher = psi_fetcher
         self.outdoor_co2 = self.config["parameters"]["outdoor_co2_ppm"]
         self.defaults = self.config["defaults"]
         self.sensor_default = self.defaults["sensor_reading_default"]
         self.thresholds = self.config["thresholds"]
         self.sensor_to_vav_map = self.config["sensor_to_vav_map"]
         self.actions_config = self.config["actions"]
+        self._POLLUTANT_TRIGGERS = _POLLUTANT_TRIGGERS
+        # Hot-loop methods read these flat attributes instead of chasing the
+        # nested threshold/action dicts on every call.
+        trigger_thresholds = self.thresholds["triggering"]
+        norm_thresholds = self.thresholds["normalization"]
+        # CO2 thresholds are relative to the outdoor baseline; pre-sum them so
+        # the hot paths compare against an absolute value directly.
+        self._thr_co2_abs = self.outdoor_co2 + trigger_thresholds["co2_ppm_above_outdoor"]
+        self._thr_tvoc = trigger_thresholds["tvoc_ug_m3"]
+        self._thr_pm2_5 = trigger_thresholds["pm2_5_ug_m3"]
+        self._thr_pm10 = trigger_thresholds["pm10_ug_m3"]
+        self._thr_hcho = trigger_thresholds["hcho_ug_m3"]
+        self._thr_rh_max = trigger_thresholds["rh_percent_max"]
+        self._thr_temp_min = trigger_thresholds["temp_c_min"]
+        self._thr_temp_max = trigger_thresholds["temp_c_max"]
+        self._max_cycles = trigger_thresholds["max_dilution_cycles"]
+        self._pad_increase_pct = trigger_thresholds.get("pad_increase_percent", 5)
+        self._persistence_delta = timedelta(minutes=trigger_thresholds["persistence_minutes"])
+        self._norm_co2_abs = self.outdoor_co2 + norm_thresholds["co2_ppm_above_outdoor"]
+        self._norm_tvoc = norm_thresholds["tvoc_ug_m3"]
+        self._norm_pm2_5 = norm_thresholds["pm2_5_ug_m3"]
+        self._norm_pm10 = norm_thresholds["pm10_ug_m3"]
+        self._norm_hcho = norm_thresholds["hcho_ug_m3"]
+        self._norm_rh_max = norm_thresholds["rh_percent_max"]
+        self._branch_b_vav_inc_pct = self.actions_config["branch_b"]["vav_flow_increase_pct"]
+        self._branch_b_chw_inc_pct = self.actions_config["branch_b"]["chw_valve_increase_pct"]
+        self._branch_c_vav_dec_pct = self.actions_config["branch_c"]["vav_flow_decrease_pct"]
+        self._branch_c_chw_dec_pct = self.actions_config["branch_c"]["chw_valve_decrease_pct"]
+        self._branch_d_chw_inc_pct = self.actions_config["branch_d"]["chw_valve_increase_pct"]
+        if not self.config.get("parameters", {}).get("enable_bms_filter_check", False):
+            # Bind a no-op once instead of re-reading the config flag on every
+            # timestamp of every simulation run.
+            self._check_bms_filter_alarms = self._bms_filter_check_disabled
+        # Event names form a small fixed vocabulary, so the log level per
+        # event is resolved once and memoized instead of re-running the
+        # endswith check on every logged action.
+        self._event_log_level = {}
+        self._reset_runtime_state()
+        logger.info("IAQ Logic Engine Initialized.")
+
+    def _reset_runtime_state(self):
+        """
+        Clears all per-run state (sensor states, event buffers, detailed log)
+        so one engine instance can run several simulations — or several tests —
+        without re-validating and re-flattening the config.
+        """
         self.sensor_states = {}
-        self.log_records = []
+        # Event log kept as parallel per-column lists; appending six scalars is
+        # cheaper than allocating a dict per event, and downstream reporting
+        # can consume the columns directly. `log_records` materializes dicts.
+        self._log_ts = []
+        self._log_sensor = []
+        self._log_event = []
+        self._log_details = []
+        self._log_reasons = []
+        self._log_cycle = []
         self.detailed_log_records = []
-        logger.info("IAQ Logic Engine Initialized.")
 
     def _validate_config(self):
         """
         Performs a strict check on the loaded configuration to ensure all required
         keys and sections are present. Fails fast on startup if the config is invalid.
         """
-        required_sections = [
-            "data_files", "api_urls", "parameters", "defaults", 
-            "thresholds", "sensor_to_vav_map", "actions"
-        ]
-        for section in required_sections:
-            if section not in self.config:
-                raise ValueError(f"Configuration Error: Section '{section}' is missing from config.yaml")
-        if "psi" not in self.config["api_urls"]:
-            raise ValueError("Configuration Error: 'psi' key is missing from 'api_urls'")
-        if "outdoor_co2_ppm" not in self.config["parameters"]:
-            raise ValueError("Configuration Error: 'outdoor_co2_ppm' is missing from 'parameters'")
-        if "sensor_reading_default" not in self.config["defaults"]:
-            raise ValueError("Configuration Error: 'sensor_reading_default' is missing from 'defaults'")
-        if "triggering" not in self.config["thresholds"] or "normalization" not in self.config["thresholds"]:
-            raise ValueError("Configuration Error: 'triggering' or 'normalization' subsection is missing from 'thresholds'")
-        required_triggers = [
-            "co2_ppm_above_outdoor", "tvoc_ug_m3", "pm2_5_ug_m3", "pm10_ug_m3",
-            "hcho_ug_m3", "rh_percent_max", "temp_c_min", "temp_c_max",
-            "persistence_minutes", "pad_increase_percent", "max_dilution_cycles"
-        ]
-        for key in required_triggers:
-            if key not in self.config["thresholds"]["triggering"]:
-                raise ValueError(f"Configuration Error: Trigger threshold '{key}' is missing from config.yaml")
-        required_norms = [
-            "co2_ppm_above_outdoor", "tvoc_ug_m3", "pm2_5_ug_m3",
-            "pm10_ug_m3", "hcho_ug_m3", "rh_percent_max"
-        ]
-        for key in required_norms:
-             if key not in self.config["thresholds"]["normalization"]:
-                raise ValueError(f"Configuration Error: Normalization threshold '{key}' is missing from config.yaml")
-        if "psi" not in self.config["thresholds"]:
-            raise ValueError("Configuration Error: 'psi' subsection is missing from 'thresholds'")
-        required_psi = ["unhealthy_min", "unhealthy_max", "very_unhealthy_min"]
-        for key in required_psi:
-            if key not in self.config["thresholds"]["psi"]:
-                raise ValueError(f"Configuration Error: PSI threshold '{key}' is missing from config.yaml")
-        if "branch_b" not in self.config["actions"] or "branch_c" not in self.config["actions"]:
-            raise ValueError("Configuration Error: 'branch_b' or 'branch_c' is missing from 'actions'")
+        for path, required_keys, message in _CONFIG_SCHEMA:
+            section = self.config
+            for part in path:
+                section = section[part]
+            for key in required_keys:
+                if key not in section:
+                    raise ValueError(message.format(key=key))
         logger.info("All required configuration sections and keys are present.")
 
     def _log_action(self, ts, sensor_id, event, details, reasons="", cycle=0):
@@ -78,24 +261,115 @@ class IAQLogicEngine:
         A helper method to log an event to the console and simultaneously store it 
         as a structured record for the final CSV report.
         """
-        log_message = f"[{ts}] Sensor {sensor_id}: {event}. Details: {details}"
-        if event.endswith("Failed"):
-            logger.warning(log_message)
-        else:
-            logger.info(log_message)
-        self.log_records.append({
-            "timestamp": ts,
-            "sensor_id": sensor_id,
-            "event": event,
-            "details": details,
-            "reasons": str(reasons),
-            "dilution_cycle": cycle,
-        })
+        level = self._event_log_level.get(event)
+        if level is None:
+            level = self._event_log_level[event] = logging.WARNING if event.endswith("Failed") else logging.INFO
+        if logger.isEnabledFor(level):
+            # %-style args defer message formatting to the handler, so a
+            # disabled level skips the string build entirely.
+            logger.log(level, "[%s] Sensor %s: %s. Details: %s", ts, sensor_id, event, details)
+        self._log_ts.append(ts)
+        self._log_sensor.append(sensor_id)
+        self._log_event.append(event)
+        self._log_details.append(details)
+        self._log_reasons.append(str(reasons))
+        self._log_cycle.append(cycle)
+
+    @property
+    def log_records(self) -> list[dict]:
+        """The recorded events materialized as a list of dicts (one per event)."""
+        return [
+            {
+                "timestamp": ts,
+                "sensor_id": sensor_id,
+                "event": event,
+                "details": details,
+                "reasons": reasons,
+                "dilution_cycle": cycle,
+            }
+            for ts, sensor_id, event, details, reasons, cycle in zip(
+                self._log_ts, self._log_sensor, self._log_event,
+                self._log_details, self._log_reasons, self._log_cycle,
+            )
+        ]
+
+    def event_log_frame(self) -> pl.DataFrame:
+        """
+        The recorded events as a Polars frame, built straight from the
+        per-column buffers. This skips the list-of-dicts detour entirely:
+        no per-event dict allocation and no row-wise schema inference.
+        Non-datetime placeholder timestamps (e.g. the "N/A" used by system
+        PSI alerts) become nulls in the timestamp column.
+
+        Returns:
+            pl.DataFrame: One row per logged event, in report schema.
+        """
+        return pl.DataFrame(
+            {
+                "timestamp": self._log_ts,
+                "sensor_id": self._log_sensor,
+                "event": self._log_event,
+                "details": self._log_details,
+                "reasons": self._log_reasons,
+                "dilution_cycle": self._log_cycle,
+            },
+            schema_overrides={
+                "timestamp": pl.Datetime,
+                "sensor_id": pl.String,
+                "event": pl.String,
+                "details": pl.String,
+                "reasons": pl.String,
+                "dilution_cycle": pl.Int64,
+            },
+            strict=False,
+        )
+
+    def _build_data_index(self, data: dict[str, pl.DataFrame]) -> dict:
+        """
+        Partitions the VAV and AHU frames by timestamp once up front, so the
+        branch logic can look rows up with O(1) dict access instead of
+        re-filtering entire columns for every sensor at every timestamp.
+
+        Args:
+            data (dict[str, pl.DataFrame]): The processed simulation data.
+
+        Returns:
+            dict: 'vav' keyed by (timestamp key, vav_id) and 'ahu' keyed by
+                timestamp key, where the key is the datetime cast to Int64
+                ticks (integer keys hash faster than datetime objects in the
+                per-row lookups). Each value is a plain dict of Python scalars
+                for the matching row, so branch code reads fields without
+                re-planning Polars queries.
+        """
+        vav_df = data.get("vav")
+        ahu_df = data.get("ahu")
+        vav_index = {}
+        if vav_df is not None and not vav_df.is_empty():
+            # One streaming pass over the rows; partitioning into per-key
+            # one-row frames first would allocate a DataFrame per VAV reading.
+            keyed = vav_df.with_columns(pl.col("datetime").cast(pl.Int64).alias("_ts_key"))
+            vav_index = {
+                (row["_ts_key"], row["vav_id"]): row
+                for row in keyed.iter_rows(named=True)
+            }
+        ahu_index = {}
+        if ahu_df is not None and not ahu_df.is_empty() and "datetime" in ahu_df.columns:
+            keyed = ahu_df.with_columns(pl.col("datetime").cast(pl.Int64).alias("_ts_key"))
+            ahu_index = {
+                row["_ts_key"]: row
+                for row in keyed.iter_rows(named=True)
+            }
+        return {"vav": vav_index, "ahu": ahu_index}
+
+    def _bms_filter_check_disabled(self, ts: timedelta, ahu_data_for_ts: pl.DataFrame) -> bool:
+        """No-op stand-in bound over _check_bms_filter_alarms when the config flag is off."""
+        return False
 
     def _check_bms_filter_alarms(self, ts: timedelta, ahu_data_for_ts: pl.DataFrame) -> bool:
         """
         Checks for active BMS filter alarms using filter status flags from the AHU data.
-        This corresponds to the top-right logic block in the flowchart.
+        This corresponds to the top-right logic block in the flowchart. When
+        'enable_bms_filter_check' is off, __init__ rebinds this name to a no-op.
 
         Args:
             ts (timedelta): The current timestamp of the simulation.
@@ -104,13 +378,11 @@ class IAQLogicEngine:
         Returns:
             bool: True if an alarm was found and handled, False otherwise.
         """
-        if not self.config.get("parameters", {}).get("enable_bms_filter_check", False):
-            return False
         if ahu_data_for_ts.is_empty():
             return False
-        ahu_row = ahu_data_for_ts.to_dicts()[0]
-        primary_filter_status = ahu_row.get("sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts")
-        secondary_filter_status = ahu_row.get("sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts")
+        ahu_row = ahu_data_for_ts.row(0, named=True)
+        primary_filter_status = ahu_row.get(self._PRI_FILT_COL)
+        secondary_filter_status = ahu_row.get(self._SEC_FILT_COL)
         if primary_filter_status == 1 or secondary_filter_status == 1:
             details = (
                 f"AHU filter clog detected (Primary Status: {primary_filter_status}, "
@@ -120,7 +392,7 @@ class IAQLogicEngine:
             return True
         return False
 
-    def _check_iaq_triggers(self, sensor_data: dict) -> list[str]:
+    def _check_iaq_triggers(self, sensor_data: dict) -> tuple[str, ...]:
         """
         Checks a single sensor's data against all IAQ triggering thresholds from the config.
 
@@ -128,26 +400,110 @@ class IAQLogicEngine:
             sensor_data (dict): A dictionary of a single sensor's readings for one timestamp.
 
         Returns:
-            list[str]: A list of reasons for the trigger (e.g., ["co2", "tvoc"]).
+            tuple[str, ...]: The reasons for the trigger (e.g., ("co2", "tvoc")).
         """
-        reasons = []
-        trigger_thresholds = self.thresholds["triggering"]
-        if sensor_data.get("co2", self.sensor_default) > self.outdoor_co2 + trigger_thresholds["co2_ppm_above_outdoor"]:
-            reasons.append("co2")
-        if sensor_data.get("tvoc", self.sensor_default) > trigger_thresholds["tvoc_ug_m3"]:
-            reasons.append("tvoc")
-        if sensor_data.get("pm2_5", self.sensor_default) > trigger_thresholds["pm2_5_ug_m3"]:
-            reasons.append("pm2_5")
-        if sensor_data.get("pm10", self.sensor_default) > trigger_thresholds["pm10_ug_m3"]:
-            reasons.append("pm10")
-        if sensor_data.get("hcho", self.sensor_default) > trigger_thresholds["hcho_ug_m3"]:
-            reasons.append("hcho")
-        if sensor_data.get("humidity", self.sensor_default) > trigger_thresholds["rh_percent_max"]:
-            reasons.append("rh")
-        temp = sensor_data.get("temperature")
-        if temp is not None and (temp < trigger_thresholds["temp_c_min"] or temp > trigger_thresholds["temp_c_max"]):
-            reasons.append("temp")
-        return reasons
+        default = self.sensor_default
+        get = sensor_data.get
+        temp = get("temperature")
+        # Branchless bit accumulation: each comparison sets one bit, and the
+        # precomputed _REASON_LOOKUP table turns the mask back into names.
+        mask = (
+            (get("co2", default) > self._thr_co2_abs)
+            | (get("tvoc", default) > self._thr_tvoc) << 1
+            | (get("pm2_5", default) > self._thr_pm2_5) << 2
+            | (get("pm10", default) > self._thr_pm10) << 3
+            | (get("hcho", default) > self._thr_hcho) << 4
+            | (get("humidity", default) > self._thr_rh_max) << 5
+            | (temp is not None and (temp < self._thr_temp_min or temp > self._thr_temp_max)) << 6
+        )
+        return self._REASON_LOOKUP[mask]
+
+    def _precompute_triggers(self, iaq_df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """
+        Annotates the IAQ frame with boolean trigger columns (_r_co2 ... _r_temp
+        plus a combined _r_any) in one vectorized pass, so the per-row simulation
+        loop reads precomputed flags instead of re-evaluating seven Python
+        comparisons for every sensor reading. Accepts either an eager or a lazy
+        frame; run_simulation feeds it a LazyFrame so the whole annotation
+        chain collects in one optimized pass.
+
+        Args:
+            iaq_df (pl.DataFrame | pl.LazyFrame): The tidy IAQ readings frame.
+
+        Returns:
+            pl.DataFrame | pl.LazyFrame: The same frame with the trigger flag columns appended.
+        """
+        columns = iaq_df.collect_schema().names()
+
+        def reading(name):
+            # Missing columns behave like the scalar checks' default reading.
+            if name in columns:
+                return pl.col(name).fill_null(self.sensor_default)
+            return pl.lit(self.sensor_default)
+
+        exprs = [
+            (reading("co2") > self._thr_co2_abs).alias("_r_co2"),
+            (reading("tvoc") > self._thr_tvoc).alias("_r_tvoc"),
+            (reading("pm2_5") > self._thr_pm2_5).alias("_r_pm2_5"),
+            (reading("pm10") > self._thr_pm10).alias("_r_pm10"),
+            (reading("hcho") > self._thr_hcho).alias("_r_hcho"),
+            (reading("humidity") > self._thr_rh_max).alias("_r_rh"),
+        ]
+        if "temperature" in columns:
+            temp = pl.col("temperature")
+            exprs.append(
+                (temp.is_not_null() & ((temp < self._thr_temp_min) | (temp > self._thr_temp_max))).alias("_r_temp")
+            )
+        else:
+            exprs.append(pl.lit(False).alias("_r_temp"))
+        return iaq_df.with_columns(exprs).with_columns([
+            pl.any_horizontal([pl.col(flag) for flag, _ in self._REASON_FLAGS]).alias("_r_any"),
+            pl.any_horizontal([pl.col(f"_r_{reason}") for reason in sorted(_POLLUTANT_TRIGGERS)]).alias("_is_pollutant"),
+            pl.concat_list([
+                pl.when(pl.col(flag)).then(pl.lit(reason)) for flag, reason in self._REASON_FLAGS
+            ]).list.drop_nulls().alias("_reasons"),
+        ])
+
+    def _precompute_normalization(self, iaq_df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """
+        Annotates the IAQ frame with boolean normalization columns
+        (_n_pollutant, _n_comfort, _n_dehumid) in one vectorized pass. These
+        mirror the scalar _check_for_*_normalization methods so the simulation
+        loop can read a precomputed flag per triggered sensor instead of
+        re-running the Python comparisons row by row. Like _precompute_triggers,
+        it works on eager and lazy frames alike.
+
+        Args:
+            iaq_df (pl.DataFrame | pl.LazyFrame): The tidy IAQ readings frame.
+
+        Returns:
+            pl.DataFrame | pl.LazyFrame: The same frame with the normalization flag columns appended.
+        """
+        columns = iaq_df.collect_schema().names()
+
+        def reading(name):
+            if name in columns:
+                return pl.col(name).fill_null(self.sensor_default)
+            return pl.lit(self.sensor_default)
+
+        pollutant_ok = (
+            (reading("co2") < self._norm_co2_abs)
+            & (reading("tvoc") < self._norm_tvoc)
+            & (reading("pm2_5") < self._norm_pm2_5)
+            & (reading("pm10") < self._norm_pm10)
+            & (reading("hcho") < self._norm_hcho)
+        )
+        if "temperature" in columns:
+            temp = pl.col("temperature")
+            comfort_ok = temp.is_not_null() & (temp >= self._thr_temp_min) & (temp <= self._thr_temp_max)
+        else:
+            comfort_ok = pl.lit(False)
+        dehumid_ok = comfort_ok & (reading("humidity") < self._norm_rh_max)
+        return iaq_df.with_columns([
+            pollutant_ok.alias("_n_pollutant"),
+            comfort_ok.alias("_n_comfort"),
+            dehumid_ok.alias("_n_dehumid"),
+        ])
 
     def _check_for_normalization(self, sensor_data: dict) -> bool:
         """
@@ -157,13 +513,18 @@ class IAQLogicEngine:
         Returns:
             bool: True if all pollutant levels are below normalization thresholds.
         """
-        norm_thresholds = self.thresholds["normalization"]
+        default = self.sensor_default
+        get = sensor_data.get
+        # Ordered by how often each term fails during an active dilution
+        # cycle: CO2 is the usual trigger and recovers slowest, so checking it
+        # first lets the AND chain short-circuit while the air is still
+        # clearing instead of evaluating all five comparisons every pass.
         return (
-            sensor_data.get("co2", self.sensor_default) < self.outdoor_co2 + norm_thresholds["co2_ppm_above_outdoor"] and
-            sensor_data.get("tvoc", self.sensor_default) < norm_thresholds["tvoc_ug_m3"] and
-            sensor_data.get("pm2_5", self.sensor_default) < norm_thresholds["pm2_5_ug_m3"] and
-            sensor_data.get("pm10", self.sensor_default) < norm_thresholds["pm10_ug_m3"] and
-            sensor_data.get("hcho", self.sensor_default) < norm_thresholds["hcho_ug_m3"]
+            get("co2", default) < self._norm_co2_abs and
+            get("tvoc", default) < self._norm_tvoc and
+            get("pm2_5", default) < self._norm_pm2_5 and
+            get("pm10", default) < self._norm_pm10 and
+            get("hcho", default) < self._norm_hcho
         )
 
     def _check_for_comfort_normalization(self, sensor_data: dict) -> bool:
@@ -175,10 +536,7 @@ class IAQLogicEngine:
             bool: True if the temperature is within the normal range.
         """
         temp = sensor_data.get("temperature")
-        trigger_thresholds = self.thresholds["triggering"]
-        norm_min = trigger_thresholds["temp_c_min"]
-        norm_max = trigger_thresholds["temp_c_max"]
-        return temp is not None and norm_min <= temp <= norm_max
+        return temp is not None and self._thr_temp_min <= temp <= self._thr_temp_max
 
     def _check_for_dehumid_normalization(self, sensor_data: dict) -> bool:
         """
@@ -188,154 +546,142 @@ class IAQLogicEngine:
         Returns:
             bool: True if both RH and temperature are within normal ranges.
         """
-        rh_norm_threshold = self.thresholds["normalization"]["rh_percent_max"]
-        rh_normalized = sensor_data.get("humidity", self.sensor_default) < rh_norm_threshold
+        rh_normalized = sensor_data.get("humidity", self.sensor_default) < self._norm_rh_max
         return self._check_for_comfort_normalization(sensor_data) and rh_normalized
 
-    def _execute_branch_a(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str]):
+    def _execute_vav_branch(self, spec: _BranchSpec, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], ts_key: int = None):
         """
-        Executes the 'Dilution Mode' logic for pollutant-based alerts (Branch A),
-        which involves controlling VAV and PAD/FAD systems.
+        Shared scaffolding for the VAV control branches (A/B/C): cycle cap,
+        cycle increment, VAV mapping and data lookup, then the branch-specific
+        setpoint action described by `spec`. `ts_key` is the integer index key
+        for `ts` as produced by `_build_data_index`.
         """
         current_state = self.sensor_states[sensor_id]
-        max_cycles = self.thresholds["triggering"]["max_dilution_cycles"]
-        if current_state["dilution_cycle_count"] >= max_cycles:
-            self._log_action(ts, sensor_id, "Dilution Failed", f"Max cycles ({max_cycles}) reached", reasons)
-            current_state["has_fired"] = True
+        max_cycles = self._max_cycles
+        if current_state.dilution_cycle_count >= max_cycles:
+            self._log_action(ts, sensor_id, f"{spec.mode} Failed", f"Max cycles ({max_cycles}) reached", reasons)
+            if spec.fail_sets_fired:
+                current_state.has_fired = True
             return
-        current_state["dilution_cycle_count"] += 1
-        cycle = current_state["dilution_cycle_count"]
+        current_state.dilution_cycle_count += 1
+        cycle = current_state.dilution_cycle_count
         vav_id = self.sensor_to_vav_map.get(sensor_id)
         if not vav_id:
-            self._log_action(ts, sensor_id, "Branch A Skipped", "No VAV mapping found", reasons, cycle)
+            self._log_action(ts, sensor_id, f"Branch {spec.letter} Skipped", "No VAV mapping found", reasons, cycle)
             return
-        self._log_action(ts, sensor_id, "Dilution Cycle Started", f"Cycle #{cycle} for VAV '{vav_id}'", reasons, cycle)
-        vav_df = all_data["vav"]
-        vav_data = vav_df.filter((pl.col("datetime") == ts) & (pl.col("vav_id") == vav_id))
-        if vav_data.is_empty():
-            self._log_action(ts, sensor_id, "Branch A Halted", f"VAV mapping exists for '{vav_id}', but no data found at this timestamp", reasons, cycle)
+        self._log_action(ts, sensor_id, f"{spec.mode} Cycle Started", f"Cycle #{cycle} for VAV '{vav_id}'", reasons, cycle)
+        vav_row = all_data["vav"].get((ts_key, vav_id))
+        if vav_row is None:
+            self._log_action(ts, sensor_id, f"Branch {spec.letter} Halted", f"VAV mapping exists for '{vav_id}', but no data found at this timestamp", reasons, cycle)
             return
-        vav_max_setpoint = vav_data.select("cmaxflo").item()
-        vav_current_setpoint = vav_data.select("supflosp").item()
-        if vav_current_setpoint < vav_max_setpoint:
-            self._log_action(ts, sensor_id, "VAV Action", f"VAV '{vav_id}' airflow not at max. Setting to maximum", reasons, cycle)
+        if spec.in_range(vav_row["supflosp"], vav_row[spec.limit_col]):
+            pct = getattr(self, spec.vav_pct_attr) if spec.vav_pct_attr else None
+            self._log_action(ts, sensor_id, spec.vav_event, spec.vav_detail.format(vav_id=vav_id, pct=pct), reasons, cycle)
+        elif spec.fallback_event is not None:
+            pct = getattr(self, spec.fallback_pct_attr)
+            self._log_action(ts, sensor_id, spec.fallback_event, spec.fallback_detail.format(pct=pct), reasons, cycle)
         else:
-            ahu_df = all_data["ahu"]
-            ahu_data = ahu_df.filter(pl.col("datetime") == ts)
-            pad_current_fb = ahu_data.select("sne22_1_ddc_19_1_ahu_19_1_fad_fb").item()
-            pad_max_stpt = ahu_data.select("sne22_1_ddc_19_1_ahu_19_1_fad_max_stpt").item()
-            if pad_current_fb < pad_max_stpt:
-                increase_pct = self.thresholds.get("triggering", {}).get("pad_increase_percent", 5)
-                self._log_action(ts, sensor_id, "PAD Action", f"VAV at max. PAD/FAD not at max. Increasing opening by {increase_pct}%", reasons, cycle)
-            else:
-                self._log_action(ts, sensor_id, "Alert", "VAV and PAD/FAD are both at maximum. Sending alert to FM team", reasons, cycle)
+            self._escalate_to_pad(ts, sensor_id, all_data, reasons, cycle, ts_key)
 
-    def _execute_branch_b(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str]):
+    def _escalate_to_pad(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], cycle: int, ts_key: int = None):
         """
-        Executes the 'Cooling Mode' logic for hot and dry comfort alerts (Branch B).
+        Branch A's escalation path once the VAV is already at maximum airflow:
+        open the PAD/FAD further, or alert the FM team if it is maxed out too.
         """
-        current_state = self.sensor_states[sensor_id]
-        max_cycles = self.thresholds["triggering"]["max_dilution_cycles"]
-        if current_state["dilution_cycle_count"] >= max_cycles:
-            self._log_action(ts, sensor_id, "Cooling Failed", f"Max cycles ({max_cycles}) reached", reasons)
-            return
-        current_state["dilution_cycle_count"] += 1
-        cycle = current_state["dilution_cycle_count"]
-        vav_id = self.sensor_to_vav_map.get(sensor_id)
-        if not vav_id:
-            self._log_action(ts, sensor_id, "Branch B Skipped", "No VAV mapping found", reasons, cycle)
-            return
-        self._log_action(ts, sensor_id, "Cooling Cycle Started", f"Cycle #{cycle} for VAV '{vav_id}'", reasons, cycle)
-        vav_data = all_data["vav"].filter((pl.col("datetime") == ts) & (pl.col("vav_id") == vav_id))
-        if vav_data.is_empty():
-            self._log_action(ts, sensor_id, "Branch B Halted", f"VAV mapping exists for '{vav_id}', but no data found at this timestamp", reasons, cycle)
-            return
-        vav_max_setpoint = vav_data.select("cmaxflo").item()
-        vav_current_setpoint = vav_data.select("supflosp").item()
-        if vav_current_setpoint < vav_max_setpoint:
-            increase_pct = self.actions_config["branch_b"]["vav_flow_increase_pct"]
-            self._log_action(ts, sensor_id, "VAV Action (Cooling)", f"VAV '{vav_id}' not at max. Increasing flow setpoint by {increase_pct}%", reasons, cycle)
+        ahu_row = all_data["ahu"][ts_key]
+        pad_current_fb = ahu_row["sne22_1_ddc_19_1_ahu_19_1_fad_fb"]
+        pad_max_stpt = ahu_row["sne22_1_ddc_19_1_ahu_19_1_fad_max_stpt"]
+        if pad_current_fb < pad_max_stpt:
+            increase_pct = self._pad_increase_pct
+            self._log_action(ts, sensor_id, "PAD Action", f"VAV at max. PAD/FAD not at max. Increasing opening by {increase_pct}%", reasons, cycle)
         else:
-            increase_pct = self.actions_config["branch_b"]["chw_valve_increase_pct"]
-            self._log_action(ts, sensor_id, "CHW Valve Action (Cooling)", f"VAV at max. Increasing Chilled Water Valve position by {increase_pct}%", reasons, cycle)
+            self._log_action(ts, sensor_id, "Alert", "VAV and PAD/FAD are both at maximum. Sending alert to FM team", reasons, cycle)
+
+    def _execute_branch_a(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], ts_key: int = None):
+        """
+        Executes the 'Dilution Mode' logic for pollutant-based alerts (Branch A),
+        which involves controlling VAV and PAD/FAD systems.
+        """
+        self._execute_vav_branch(_BRANCH_SPECS["A"], ts, sensor_id, all_data, reasons, ts_key)
+
+    def _execute_branch_b(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], ts_key: int = None):
+        """
+        Executes the 'Cooling Mode' logic for hot and dry comfort alerts (Branch B).
+        """
+        self._execute_vav_branch(_BRANCH_SPECS["B"], ts, sensor_id, all_data, reasons, ts_key)
 
-    def _execute_branch_c(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str]):
+    def _execute_branch_c(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], ts_key: int = None):
         """
         Executes the 'Warming Mode' logic for cold and dry comfort alerts (Branch C).
         """
-        current_state = self.sensor_states[sensor_id]
-        max_cycles = self.thresholds["triggering"]["max_dilution_cycles"]
-        if current_state["dilution_cycle_count"] >= max_cycles:
-            self._log_action(ts, sensor_id, "Warming Failed", f"Max cycles ({max_cycles}) reached", reasons)
-            return
-        current_state["dilution_cycle_count"] += 1
-        cycle = current_state["dilution_cycle_count"]
-        vav_id = self.sensor_to_vav_map.get(sensor_id)
-        if not vav_id:
-            self._log_action(ts, sensor_id, "Branch C Skipped", "No VAV mapping found", reasons, cycle)
-            return
-        self._log_action(ts, sensor_id, "Warming Cycle Started", f"Cycle #{cycle} for VAV '{vav_id}'", reasons, cycle)
-        vav_data = all_data["vav"].filter((pl.col("datetime") == ts) & (pl.col("vav_id") == vav_id))
-        if vav_data.is_empty():
-            self._log_action(ts, sensor_id, "Branch C Halted", f"VAV mapping exists for '{vav_id}', but no data found at this timestamp", reasons, cycle)
-            return
-        vav_min_setpoint = vav_data.select("ocmnc_sp").item()
-        vav_current_setpoint = vav_data.select("supflosp").item()
-        if vav_current_setpoint > vav_min_setpoint:
-            decrease_pct = self.actions_config["branch_c"]["vav_flow_decrease_pct"]
-            self._log_action(ts, sensor_id, "VAV Action (Warming)", f"VAV '{vav_id}' not at min. Decreasing flow setpoint by {decrease_pct}%", reasons, cycle)
-        else:
-            decrease_pct = self.actions_config["branch_c"]["chw_valve_decrease_pct"]
-            self._log_action(ts, sensor_id, "CHW Valve Action (Warming)", f"VAV at min. Decreasing Chilled Water Valve position by {decrease_pct}%", reasons, cycle)
+        self._execute_vav_branch(_BRANCH_SPECS["C"], ts, sensor_id, all_data, reasons, ts_key)
 
-    def _execute_branch_d(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str]):
+    def _execute_branch_d(self, ts: timedelta, sensor_id: str, all_data: dict, reasons: list[str], ts_key: int = None):
         """
         Executes the 'Dehumidification Mode' logic for high humidity comfort alerts (Branch D).
         """
         current_state = self.sensor_states[sensor_id]
-        max_cycles = self.thresholds["triggering"]["max_dilution_cycles"]
-        if current_state["dilution_cycle_count"] >= max_cycles:
+        max_cycles = self._max_cycles
+        if current_state.dilution_cycle_count >= max_cycles:
             self._log_action(ts, sensor_id, "Dehumidification Failed", f"Max cycles ({max_cycles}) reached", reasons)
             return
-        current_state["dilution_cycle_count"] += 1
-        cycle = current_state["dilution_cycle_count"]
+        current_state.dilution_cycle_count += 1
+        cycle = current_state.dilution_cycle_count
         self._log_action(ts, sensor_id, "Dehumidification Cycle Started", f"Cycle #{cycle}", reasons, cycle)
-        increase_pct = self.actions_config["branch_d"]["chw_valve_increase_pct"]
+        increase_pct = self._branch_d_chw_inc_pct
         self._log_action(ts, sensor_id, "CHW Valve Action (Dehumidifying)", f"Increasing Chilled Water Valve position by {increase_pct}%", reasons, cycle)
 
-    def _handle_persistent_alert(self, ts: timedelta, sensor_id: str, sensor_data: dict, reasons: list[str], all_data: dict):
+    def _handle_persistent_alert(self, ts: timedelta, sensor_id: str, sensor_data: dict, reasons: list[str], all_data: dict, ts_key: int = None):
         """
         The main router function. It takes a persistent alert and decides which
         logic branch (A, B, C, or D) to execute based on the trigger reasons.
         """
-        pollutant_triggers = {"co2", "tvoc", "pm2_5", "pm10", "hcho"}
-        is_pollutant_alert = any(reason in pollutant_triggers for reason in reasons)
+        # Rows from _precompute_triggers carry the routing decision as a flag;
+        # ad-hoc reading dicts fall back to the set intersection.
+        is_pollutant_alert = sensor_data.get("_is_pollutant")
+        if is_pollutant_alert is None:
+            is_pollutant_alert = bool(self._POLLUTANT_TRIGGERS.intersection(reasons))
         if is_pollutant_alert:
-            self.sensor_states[sensor_id]["alert_type"] = "pollutant"
+            self.sensor_states[sensor_id].alert_type = "pollutant"
             self._log_action(ts, sensor_id, "Branch Routing", "Pollutant alert. Routing to Branch A.", reasons)
-            self._execute_branch_a(ts, sensor_id, all_data, reasons)
+            self._execute_branch_a(ts, sensor_id, all_data, reasons, ts_key)
         else:
-            trigger_thresholds = self.thresholds["triggering"]
-            rh_max = trigger_thresholds["rh_percent_max"]
-            temp_max = trigger_thresholds["temp_c_max"]
-            temp_min = trigger_thresholds["temp_c_min"]
+            rh_max = self._thr_rh_max
+            temp_max = self._thr_temp_max
+            temp_min = self._thr_temp_min
             rh = sensor_data.get("humidity", self.sensor_default)
             temp = sensor_data.get("temperature")
             if rh < rh_max and temp > temp_max:
-                self.sensor_states[sensor_id]["alert_type"] = "comfort_hot"
+                self.sensor_states[sensor_id].alert_type = "comfort_hot"
                 self._log_action(ts, sensor_id, "Branch Routing", "Comfort alert (Too Hot). Routing to Branch B.", reasons)
-                self._execute_branch_b(ts, sensor_id, all_data, reasons)
+                self._execute_branch_b(ts, sensor_id, all_data, reasons, ts_key)
             elif rh < rh_max and temp < temp_min:
-                self.sensor_states[sensor_id]["alert_type"] = "comfort_cold"
+                self.sensor_states[sensor_id].alert_type = "comfort_cold"
                 self._log_action(ts, sensor_id, "Branch Routing", "Comfort alert (Too Cold). Routing to Branch C.", reasons)
-                self._execute_branch_c(ts, sensor_id, all_data, reasons)
+                self._execute_branch_c(ts, sensor_id, all_data, reasons, ts_key)
             elif rh >= rh_max:
-                self.sensor_states[sensor_id]["alert_type"] = "comfort_humid"
+                self.sensor_states[sensor_id].alert_type = "comfort_humid"
                 self._log_action(ts, sensor_id, "Branch Routing", "Comfort alert (Too Humid). Routing to Branch D.", reasons)
-                self._execute_branch_d(ts, sensor_id, all_data, reasons)
+                self._execute_branch_d(ts, sensor_id, all_data, reasons, ts_key)
             else:
                 self._log_action(ts, sensor_id, "Conflict Alert", "Ambiguous comfort triggers. Sending alert to FM team", reasons)
 
+    def _append_detailed_record(self, ts, sensor_id: str, current_state: _SensorState, sensor_row: dict):
+        """Appends one minute-by-minute sensor state snapshot to the detailed log."""
+        self.detailed_log_records.append({
+            "timestamp": ts,
+            "sensor_id": sensor_id,
+            "is_triggered": current_state.is_triggered,
+            "has_fired": current_state.has_fired,
+            "alert_type": current_state.alert_type,
+            "dilution_cycle": current_state.dilution_cycle_count,
+            "temperature": sensor_row.get("temperature"),
+            "co2": sensor_row.get("co2"),
+            "humidity": sensor_row.get("humidity"),
+            "tvoc": sensor_row.get("tvoc"),
+            "pm2_5": sensor_row.get("pm2_5"),
+        })
+
     def run_simulation(self, data: dict[str, pl.DataFrame]) -> list[dict]:
         """
         The main entry point for the simulation. It iterates through every timestamp 
@@ -347,72 +693,99 @@ class IAQLogicEngine:
         """
         iaq_df = data["iaq"]
         ahu_df = data["ahu"]
-        timestamps = iaq_df["datetime"].unique().sort()
-        persistence_delta = timedelta(minutes=self.thresholds["triggering"]["persistence_minutes"])
+        # Ingestion hands over frames sorted by datetime with the sorted flag
+        # set, so first-occurrence order is already chronological and the
+        # O(n log n) re-sort of the unique timestamps can be skipped.
+        timestamps = iaq_df["datetime"].unique(maintain_order=True)
+        persistence_delta = self._persistence_delta
         simulation_date = timestamps[0].date() if not timestamps.is_empty() else None
-        psi_data = fetch_psi_data(date=simulation_date)
-        psi_value_24hr = None
-        if not psi_data.is_empty():
-            psi_value_24hr = psi_data.filter(
-                pl.col("metric") == "psi_twenty_four_hourly"
-            ).select("central").item()
+        psi_url = self.config["api_urls"]["psi"]
+        if self._psi_fetcher is None:
+            psi_value_24hr = _psi_value_for_day(psi_url, simulation_date)
+        else:
+            # Injected fetchers skip the module caches so callers always see
+            # their own provider's response.
+            psi_value_24hr = _psi_central_value(self._psi_fetcher(psi_url, date=simulation_date))
         if psi_value_24hr:
             psi_thresholds = self.thresholds["psi"]
             if psi_thresholds["unhealthy_min"] <= psi_value_24hr <= psi_thresholds["unhealthy_max"]:
                  self._log_action(ts="N/A", sensor_id="SYSTEM", event="PSI Alert", details="PSI is Unhealthy. Haze Mode Protocol triggered. Recommending Carbon Filters.")
             elif psi_value_24hr >= psi_thresholds["very_unhealthy_min"]:
                  self._log_action(ts="N/A", sensor_id="SYSTEM", event="PSI Alert", details="PSI is Very Unhealthy/Hazardous. Recommending HEPA Filters.")
-        for ts in timestamps:
-            ahu_data_for_ts = ahu_df.filter(pl.col("datetime") == ts)
+        data_index = self._build_data_index(data)
+        # Build the whole annotation chain lazily and collect once: the query
+        # optimizer fuses the trigger/normalization/key expressions into a
+        # single streaming pass instead of materializing three intermediates.
+        iaq_lf = self._precompute_normalization(self._precompute_triggers(iaq_df.lazy()))
+        # All per-timestamp dicts are keyed by the datetime cast to Int64 ticks;
+        # integer keys hash faster than datetime objects in the row loop.
+        iaq_df = iaq_lf.with_columns(pl.col("datetime").cast(pl.Int64).alias("_ts_key")).collect(engine="streaming")
+        iaq_by_ts = iaq_df.partition_by(["_ts_key"], as_dict=True) if not iaq_df.is_empty() else {}
+        if not ahu_df.is_empty() and "datetime" in ahu_df.columns:
+            ahu_by_ts = {
+                key[0]: frame
+                for key, frame in ahu_df.with_columns(pl.col("datetime").cast(pl.Int64).alias("_ts_key")).partition_by(["_ts_key"], as_dict=True).items()
+            }
+        else:
+            ahu_by_ts = {}
+        empty_ahu = ahu_df.clear()
+        time_unit = getattr(iaq_df.schema["datetime"], "time_unit", "us")
+        persistence_ticks = int(persistence_delta.total_seconds() * _UNIT_PER_SECOND[time_unit])
+        ts_keys = iaq_df["_ts_key"].unique(maintain_order=True)
+        for ts, ts_key in zip(timestamps, ts_keys):
+            ahu_data_for_ts = ahu_by_ts.get(ts_key, empty_ahu)
             if self._check_bms_filter_alarms(ts, ahu_data_for_ts):
                 continue
-            readings_for_ts = iaq_df.filter(pl.col("datetime") == ts)
-            for sensor_row in readings_for_ts.to_dicts():
+            readings_for_ts = iaq_by_ts[(ts_key,)]
+            for sensor_row in readings_for_ts.iter_rows(named=True):
                 sensor_id = sensor_row["sensor_id"]
-                if sensor_id not in self.sensor_states:
-                    self.sensor_states[sensor_id] = {"is_triggered": False, "alert_start_time": None, "has_fired": False, "dilution_cycle_count": 0, "alert_type": None}
-                current_state = self.sensor_states[sensor_id]
-                if current_state["is_triggered"]:
+                current_state = self.sensor_states.get(sensor_id)
+                if current_state is None:
+                    current_state = self.sensor_states[sensor_id] = _SensorState()
+                # Steady-state short-circuit: with nothing triggering and no
+                # active alert there is no state to advance, only the detailed
+                # record below to append.
+                if not sensor_row["_r_any"] and not current_state.is_triggered:
+                    self._append_detailed_record(ts, sensor_id, current_state, sensor_row)
+                    continue
+                if current_state.is_triggered:
                     normalized = False
-                    alert_type = current_state["alert_type"]
+                    alert_type = current_state.alert_type
                     if alert_type == "pollutant":
-                        if self._check_for_normalization(sensor_row):
+                        if sensor_row["_n_pollutant"]:
                             self._log_action(ts, sensor_id, "Normalization", "Dilution Successful! Pollutant levels normalized.")
                             normalized = True
                     elif alert_type in ["comfort_hot", "comfort_cold"]:
-                         if self._check_for_comfort_normalization(sensor_row):
+                         if sensor_row["_n_comfort"]:
                             self._log_action(ts, sensor_id, "Normalization", "Comfort Restored! Temperature is normal.")
                             normalized = True
                     elif alert_type == "comfort_humid":
-                         if self._check_for_dehumid_normalization(sensor_row):
+                         if sensor_row["_n_dehumid"]:
                             self._log_action(ts, sensor_id, "Normalization", "Dehumidification Successful! RH and Temp are normal.")
                             normalized = True
                     if normalized:
-                        current_state.update({"is_triggered": False, "alert_start_time": None, "has_fired": False, "dilution_cycle_count": 0, "alert_type": None})
-                trigger_reasons = self._check_iaq_triggers(sensor_row)
+                        current_state.reset()
+                trigger_reasons = sensor_row["_reasons"]
                 is_currently_triggered = bool(trigger_reasons)
-                if is_currently_triggered and not current_state["is_triggered"]:
-                    alert_type = "pollutant" if any(r in {"co2", "tvoc", "pm2_5", "pm10", "hcho"} for r in trigger_reasons) else "comfort"
-                    current_state.update({"is_triggered": True, "alert_start_time": ts, "has_fired": False, "dilution_cycle_count": 0, "alert_type": alert_type})
-                elif is_currently_triggered and current_state["is_triggered"]:
-                    duration = ts - current_state["alert_start_time"]
-                    if duration >= persistence_delta and not current_state["has_fired"]:
-                        self._handle_persistent_alert(ts, sensor_id, sensor_row, trigger_reasons, data)
-                        current_state["has_fired"] = True
-                elif not is_currently_triggered and current_state["is_triggered"]:
-                    current_state.update({"is_triggered": False, "alert_start_time": None, "has_fired": False})
-                self.detailed_log_records.append({
-                    "timestamp": ts,
-                    "sensor_id": sensor_id,
-                    "is_triggered": current_state["is_triggered"],
-                    "has_fired": current_state["has_fired"],
-                    "alert_type": current_state["alert_type"],
-                    "dilution_cycle": current_state["dilution_cycle_count"],
-                    "temperature": sensor_row.get("temperature"),
-                    "co2": sensor_row.get("co2"),
-                    "humidity": sensor_row.get("humidity"),
-                    "tvoc": sensor_row.get("tvoc"),
-                    "pm2_5": sensor_row.get("pm2_5"),
-                })
+                if is_currently_triggered and not current_state.is_triggered:
+                    # The persistence deadline is fixed at alert start, so the
+                    # steady-state path compares timestamps instead of
+                    # re-deriving a duration every iteration.
+                    current_state.is_triggered = True
+                    current_state.alert_start_time = ts
+                    current_state.fire_at = ts_key + persistence_ticks
+                    current_state.has_fired = False
+                    current_state.dilution_cycle_count = 0
+                    current_state.alert_type = "pollutant" if sensor_row["_is_pollutant"] else "comfort"
+                elif is_currently_triggered and current_state.is_triggered:
+                    if not current_state.has_fired and ts_key >= current_state.fire_at:
+                        self._handle_persistent_alert(ts, sensor_id, sensor_row, trigger_reasons, data_index, ts_key)
+                        current_state.has_fired = True
+                elif not is_currently_triggered and current_state.is_triggered:
+                    current_state.is_triggered = False
+                    current_state.alert_start_time = None
+                    current_state.fire_at = None
+                    current_state.has_fired = False
+                self._append_detailed_record(ts, sensor_id, current_state, sensor_row)
         logger.info("Simulation finished.")
         return self.log_records, self.detailed_log_records
\ No newline at end of file
@@ -6,18 +6,43 @@ import polars as pl
 # Initialization
 logger = logging.getLogger(__name__)
 
-def generate_event_reports(event_records: list[dict], output_dir: Path, run_timestamp: str):
+def _write_report(df: pl.DataFrame, path: Path, file_format: str) -> Path:
     """
-    Generates a log of significant events and a summary report.
+    Writes a report frame as CSV or Parquet. Parquet uses columnar encoding
+    with snappy compression, which writes faster and produces much smaller
+    files than CSV on large simulation runs.
 
     Args:
-        event_records (list[dict]): The event-only log from the engine.
-        output_dir (Path): The directory path for the report files.
-        run_timestamp (str): A timestamp string for unique filenames.
+        df (pl.DataFrame): The report frame to serialize.
+        path (Path): The output path; its suffix is adjusted to the format.
+        file_format (str): Either "csv" (default, human-readable) or "parquet".
+
+    Returns:
+        Path: The path actually written.
     """
-    if not event_records:
-        logger.warning("No event records were generated. Skipping event report creation.")
-        return
+    if file_format == "parquet":
+        path = path.with_suffix(".parquet")
+        df.write_parquet(path, compression="snappy")
+    elif file_format == "csv":
+        df.write_csv(path)
+    else:
+        raise ValueError(f"Unsupported report format: '{file_format}'. Use 'csv' or 'parquet'.")
+    return path
+
+def _build_event_df(event_records) -> pl.DataFrame:
+    """
+    Normalizes the event log into the report frame: a columnar frame from the
+    engine passes straight through, while a list of record dicts is converted
+    with the report schema applied up front.
+
+    Args:
+        event_records (pl.DataFrame | list[dict]): The event-only log.
+
+    Returns:
+        pl.DataFrame: The event log in report schema.
+    """
+    if isinstance(event_records, pl.DataFrame):
+        return event_records
     schema = {
         "timestamp": pl.Datetime,
         "sensor_id": pl.String,
@@ -26,19 +51,44 @@ def generate_event_reports(event_records: list[dict], output_dir: Path, run_time
         "reasons": pl.String,
         "dilution_cycle": pl.Int64
     }
+    return pl.DataFrame(event_records, schema_overrides=schema)
+
+def generate_event_reports(event_records, output_dir: Path, run_timestamp: str, file_format: str = "csv"):
+    """
+    Generates a log of significant events and a summary report.
+
+    Args:
+        event_records (pl.DataFrame | list[dict]): The event-only log from the
+            engine, either already columnar (IAQLogicEngine.event_log_frame)
+            or as a list of record dicts.
+        output_dir (Path): The directory path for the report files.
+        run_timestamp (str): A timestamp string for unique filenames.
+        file_format (str): Output format, "csv" (default) or "parquet".
+    """
+    if isinstance(event_records, pl.DataFrame):
+        if event_records.is_empty():
+            logger.warning("No event records were generated. Skipping event report creation.")
+            return
+    elif not event_records:
+        logger.warning("No event records were generated. Skipping event report creation.")
+        return
+    events_lf = _build_event_df(event_records).lazy()
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info("Generating event log report...")
-    events_df = pl.DataFrame(event_records, schema_overrides=schema)
-    event_log_path = output_dir / f"event_log_{run_timestamp}.csv"
-    events_df.write_csv(event_log_path)
+    # Build the event log and its summary as two lazy plans over the same
+    # source and collect them together, so Polars executes both in parallel
+    # instead of scanning the events twice.
+    events_df, summary_df = pl.collect_all([
+        events_lf,
+        events_lf.group_by(["sensor_id", "event"]).len(),
+    ])
+    event_log_path = _write_report(events_df, output_dir / f"event_log_{run_timestamp}.csv", file_format)
     logger.info(f"Event log saved to: {event_log_path}")
     logger.info("Generating event summary report...")
-    summary_df = events_df.group_by(["sensor_id", "event"]).len()
-    summary_report_path = output_dir / f"summary_report_{run_timestamp}.csv"
-    summary_df.write_csv(summary_report_path)
+    summary_report_path = _write_report(summary_df, output_dir / f"summary_report_{run_timestamp}.csv", file_format)
     logger.info(f"Summary report saved to: {summary_report_path}")
 
-def generate_detailed_simulation_log(detailed_records: list[dict], output_dir: Path, run_timestamp: str):
+def generate_detailed_simulation_log(detailed_records: list[dict], output_dir: Path, run_timestamp: str, file_format: str = "csv"):
     """
     Generates a detailed, timestamp-by-timestamp log of the entire simulation.
 
@@ -46,6 +96,7 @@ def generate_detailed_simulation_log(detailed_records: list[dict], output_dir: P
         detailed_records (list[dict]): The detailed simulation log from the engine.
         output_dir (Path): The directory path for the report file.
         run_timestamp (str): A timestamp string for unique filenames.
+        file_format (str): Output format, "csv" (default) or "parquet".
     """
     if not detailed_records:
         logger.warning("No detailed simulation records were generated. Skipping detailed log creation.")
@@ -53,6 +104,5 @@ def generate_detailed_simulation_log(detailed_records: list[dict], output_dir: P
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info("Generating detailed per-timestamp simulation log...")
     detailed_df = pl.DataFrame(detailed_records)
-    detailed_log_path = output_dir / f"detailed_simulation_log_{run_timestamp}.csv"
-    detailed_df.write_csv(detailed_log_path)
-    logger.info(f"Detailed simulation log saved to: {detailed_log_path}")
\ No newline at end of file
+    detailed_log_path = _write_report(detailed_df, output_dir / f"detailed_simulation_log_{run_timestamp}.csv", file_format)
+    logger.info(f"Detailed simulation log saved to: {detailed_log_path}")
@@ -1,5 +1,6 @@
 # Import Libraries
 from datetime import datetime
+import copy
 import polars as pl
 import pytest
 import yaml
@@ -58,15 +59,36 @@ def mock_config_path(project_root):
         yaml.dump(config_data, file)
     return config_path
 
-@pytest.fixture
-def base_config(mock_config_path):
+@pytest.fixture(scope="session")
+def base_config_frozen(mock_config_path):
     """
-    A fixture that loads the mock config file and returns it as a Python dictionary.
-    This is used by any test that needs to access configuration values.
+    The mock configuration loaded once for the whole session. Treat it as
+    read-only: tests that delete or overwrite keys must use base_config,
+    which hands out a private copy.
     """
     from src.config import load_config
     return load_config(mock_config_path)
 
+@pytest.fixture
+def base_config(base_config_frozen):
+    """
+    A per-test deepcopy of the session configuration, for the tests that
+    mutate it (e.g. deleting keys to exercise validation failures).
+    """
+    return copy.deepcopy(base_config_frozen)
+
+@pytest.fixture(scope="session")
+def prebuilt_engine(base_config_frozen):
+    """
+    One engine for the whole session, for tests that only exercise read-only
+    logic. Construction re-validates and flattens the config, so sharing the
+    instance avoids repeating that for every parametrized case; tests call
+    _reset_runtime_state() to start from a clean slate. Tests that mutate the
+    config still build their own engine from base_config.
+    """
+    from src.logic_engine import IAQLogicEngine
+    return IAQLogicEngine(base_config_frozen)
+
 @pytest.fixture
 def mock_processed_data():
     """
@@ -1,6 +1,7 @@
 # Import Libraries
 from datetime import datetime
 from src.data_ingestion import _read_data_file, fetch_psi_data, load_and_process_data
+import json
 import polars as pl
 import pytest
 
@@ -14,7 +15,7 @@ def test_read_data_file_prefers_parquet(tmp_path):
     df_parquet.write_parquet(parquet_path)
     df_csv.write_csv(csv_path)
     result = _read_data_file(base_path)
-    assert result.equals(df_parquet)
+    assert result.collect().equals(df_parquet)
 
 def test_read_data_file_falls_back_to_csv(tmp_path):
     """Tests that the helper falls back to .csv if .parquet does not exist."""
@@ -23,7 +24,7 @@ def test_read_data_file_falls_back_to_csv(tmp_path):
     df_csv = pl.DataFrame({"a": [3], "b": [4]})
     df_csv.write_csv(csv_path)
     result = _read_data_file(base_path)
-    assert result.equals(df_csv)
+    assert result.collect().equals(df_csv)
 
 def test_read_data_file_exits_if_no_file(tmp_path, monkeypatch):
     """Tests that the program exits if neither file type is found."""
@@ -32,16 +33,24 @@ def test_read_data_file_exits_if_no_file(tmp_path, monkeypatch):
     assert error.type == SystemExit
     assert error.value.code == 1
 
+class MockSession:
+    """A stand-in for the pooled HTTP session used by fetch_psi_data."""
+    def __init__(self, get_func):
+        self._get_func = get_func
+    def get(self, url, params=None, timeout=None):
+        return self._get_func(url, params)
+
 @pytest.fixture
 def mock_requests_get(monkeypatch):
     """
-    A fixture that mocks the `requests.get` function to simulate API calls.
+    A fixture that mocks the shared HTTP session to simulate API calls.
     This prevents tests from making real network requests, making them fast and reliable.
     """
     class MockResponse:
         def __init__(self, json_data, status_code):
             self.json_data = json_data
             self.status_code = status_code
+            self.content = json.dumps(json_data).encode()
         def json(self):
             return self.json_data
 
@@ -56,19 +65,17 @@ def mock_requests_get(monkeypatch):
                     "data": {"items": [{"readings": {"psi_twenty_four_hourly": {"central": 50}}}]}
                 }, 200)
         return MockResponse({"errorMsg": "URL not found in mock"}, 404)
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("src.data_ingestion._get_session", lambda: MockSession(mock_get))
 
-def test_fetch_psi_data_latest_success(mock_requests_get, base_config, monkeypatch):
+def test_fetch_psi_data_latest_success(mock_requests_get, base_config):
     """Tests successfully fetching the 'latest' PSI data."""
-    monkeypatch.setattr("src.data_ingestion.load_config", lambda: base_config)
-    df = fetch_psi_data()
+    df = fetch_psi_data(base_config["api_urls"]["psi"])
     assert not df.is_empty()
     assert df.filter(pl.col("metric") == "psi_twenty_four_hourly").select("central").item() == 50
 
-def test_fetch_psi_data_specific_date_success(mock_requests_get, base_config, monkeypatch):
+def test_fetch_psi_data_specific_date_success(mock_requests_get, base_config):
     """Tests successfully fetching PSI data for a specific date."""
-    monkeypatch.setattr("src.data_ingestion.load_config", lambda: base_config)
-    df = fetch_psi_data(date=datetime(2025, 10, 1))
+    df = fetch_psi_data(base_config["api_urls"]["psi"], date=datetime(2025, 10, 1))
     assert not df.is_empty()
     assert df.filter(pl.col("metric") == "psi_twenty_four_hourly").select("central").item() == 150
 
@@ -76,22 +83,36 @@ def test_fetch_psi_data_api_error(monkeypatch, base_config):
     """Tests that the function handles API errors (e.g., 400 status) gracefully."""
     class MockResponse:
         status_code = 400
+        content = json.dumps({"errorMsg": "Invalid date format"}).encode()
         def json(self):
             return {"errorMsg": "Invalid date format"}
-    monkeypatch.setattr("requests.get", lambda url, params: MockResponse())
-    monkeypatch.setattr("src.data_ingestion.load_config", lambda: base_config)
-    df = fetch_psi_data()
+    monkeypatch.setattr("src.data_ingestion._get_session", lambda: MockSession(lambda url, params: MockResponse()))
+    df = fetch_psi_data(base_config["api_urls"]["psi"])
     assert df.is_empty()
 
 def test_fetch_psi_data_no_readings(monkeypatch, base_config):
     """Tests that the function handles a successful response with no data."""
     class MockResponse:
         status_code = 200
+        content = json.dumps({"data": {"items": [{"readings": {}}]}}).encode()
         def json(self):
             return {"data": {"items": [{"readings": {}}]}}
-    monkeypatch.setattr("requests.get", lambda url, params: MockResponse())
-    monkeypatch.setattr("src.data_ingestion.load_config", lambda: base_config)
-    df = fetch_psi_data()
+    monkeypatch.setattr("src.data_ingestion._get_session", lambda: MockSession(lambda url, params: MockResponse()))
+    df = fetch_psi_data(base_config["api_urls"]["psi"])
+    assert df.is_empty()
+
+def test_fetch_psi_data_non_json_body(monkeypatch, base_config):
+    """
+    Tests that a non-JSON response body (e.g. an HTML error page from a
+    gateway) is handled gracefully instead of raising a decode error.
+    """
+    class MockResponse:
+        status_code = 502
+        content = b"<html><body>502 Bad Gateway</body></html>"
+        def json(self):
+            return json.loads(self.content)
+    monkeypatch.setattr("src.data_ingestion._get_session", lambda: MockSession(lambda url, params: MockResponse()))
+    df = fetch_psi_data(base_config["api_urls"]["psi"])
     assert df.is_empty()
 
 def test_load_and_process_data_success(tmp_path, base_config):
@@ -1,13 +1,17 @@
 # Import Libraries
 from datetime import datetime
-from src.logic_engine import IAQLogicEngine
+from src.logic_engine import IAQLogicEngine, _SensorState
 import logging
 import polars as pl
 import pytest
 
-def test_engine_initialization_success(base_config):
+# A frozen timestamp for unit tests: deterministic logs and no clock syscall
+# per test.
+FIXED_TS = datetime(2025, 1, 1, 12, 0, 0)
+
+def test_engine_initialization_success(base_config_frozen):
     """Tests that the engine initializes correctly with a valid config."""
-    engine = IAQLogicEngine(base_config)
+    engine = IAQLogicEngine(base_config_frozen)
     assert engine.outdoor_co2 == 415
     assert "triggering" in engine.thresholds
 
@@ -29,163 +33,180 @@ def test_engine_init_fails_on_missing_trigger_key(base_config):
     with pytest.raises(ValueError, match="Trigger threshold 'persistence_minutes' is missing"):
         IAQLogicEngine(base_config)
 
-@pytest.mark.parametrize("sensor_data, expected_reasons", [
-    ({"co2": 1000, "tvoc": 100}, ["co2"]),
-    ({"tvoc": 600}, ["tvoc"]),
-    ({"pm2_5": 30}, ["pm2_5"]),
-    ({"pm10": 60}, ["pm10"]),
-    ({"hcho": 110}, ["hcho"]),
-    ({"humidity": 75}, ["rh"]),
-    ({"temperature": 22}, ["temp"]),
-    ({"temperature": 26}, ["temp"]),
-    ({"co2": 1000, "temperature": 22}, ["co2", "temp"]),
-    ({"co2": 400, "tvoc": 100, "temperature": 24}, []),
-])
-def test_check_iaq_triggers(base_config, sensor_data, expected_reasons):
+def test_check_iaq_triggers(prebuilt_engine):
     """
-    Uses @parametrize to run multiple small unit tests on the _check_iaq_triggers
-    method, checking various combinations of sensor data.
+    Table-driven test covering the _check_iaq_triggers combinations in a
+    single collection node; ten parametrized cases each paid pytest's
+    per-test setup and reporting overhead for a microsecond assertion.
     """
-    engine = IAQLogicEngine(base_config)
-    reasons = engine._check_iaq_triggers(sensor_data)
-    assert sorted(reasons) == sorted(expected_reasons)
+    cases = [
+        ({"co2": 1000, "tvoc": 100}, ["co2"]),
+        ({"tvoc": 600}, ["tvoc"]),
+        ({"pm2_5": 30}, ["pm2_5"]),
+        ({"pm10": 60}, ["pm10"]),
+        ({"hcho": 110}, ["hcho"]),
+        ({"humidity": 75}, ["rh"]),
+        ({"temperature": 22}, ["temp"]),
+        ({"temperature": 26}, ["temp"]),
+        ({"co2": 1000, "temperature": 22}, ["co2", "temp"]),
+        ({"co2": 400, "tvoc": 100, "temperature": 24}, []),
+    ]
+    for sensor_data, expected_reasons in cases:
+        reasons = prebuilt_engine._check_iaq_triggers(sensor_data)
+        assert sorted(reasons) == sorted(expected_reasons), f"case: {sensor_data}"
 
-def test_check_for_normalization(base_config):
+def test_check_for_normalization(prebuilt_engine):
     """Unit tests the pollutant normalization check."""
-    engine = IAQLogicEngine(base_config)
     normalized_data = {"co2": 800, "tvoc": 300, "pm2_5": 15, "pm10": 30, "hcho": 50}
     unnormalized_data = {"co2": 950, "tvoc": 300} # co2 is still too high
-    assert engine._check_for_normalization(normalized_data) is True
-    assert engine._check_for_normalization(unnormalized_data) is False
+    assert prebuilt_engine._check_for_normalization(normalized_data) is True
+    assert prebuilt_engine._check_for_normalization(unnormalized_data) is False
 
-def test_check_bms_filter_alarms(base_config):
+def test_check_bms_filter_alarms(prebuilt_engine):
     """Unit tests the BMS filter alarm check."""
-    engine = IAQLogicEngine(base_config)
-    ts = datetime.now()
-    alarm_df = pl.DataFrame({"sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts": [1], "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts": [0]})
-    no_alarm_df = pl.DataFrame({"sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts": [0], "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts": [0]})
+    engine = prebuilt_engine
+    engine._reset_runtime_state()
+    ts = FIXED_TS
+    # Explicit narrow-int schema: skips dtype inference and matches the
+    # realistic width of the BMS status flags.
+    status_schema = {"sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts": pl.Int8, "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts": pl.Int8}
+    alarm_df = pl.DataFrame({"sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts": [1], "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts": [0]}, schema=status_schema)
+    no_alarm_df = pl.DataFrame({"sne22_1_ddc_19_1_ahu_19_1_pri_filt_sts": [0], "sne22_1_ddc_19_1_ahu_19_1_sec_fil_sts": [0]}, schema=status_schema)
     assert engine._check_bms_filter_alarms(ts, alarm_df) is True
     assert "BMS Filter Alarm" in engine.log_records[-1]["event"]
     assert engine._check_bms_filter_alarms(ts, no_alarm_df) is False
 
-def test_execute_branch_a_vav_not_at_max(base_config, mock_processed_data):
-    """Tests the first action of Branch A (increasing VAV)."""
-    engine = IAQLogicEngine(base_config)
-    engine.sensor_states["047"] = {"dilution_cycle_count": 0}
+@pytest.mark.parametrize("method, reasons, expected_event, expected_substring", [
+    ("_execute_branch_a", ["tvoc"], "VAV Action", "airflow not at max"),
+    ("_execute_branch_b", ["temp"], "VAV Action (Cooling)", "Increasing flow setpoint by 10%"),
+    ("_execute_branch_c", ["temp"], "VAV Action (Warming)", "Decreasing flow setpoint by 10%"),
+    ("_execute_branch_d", ["rh"], "CHW Valve Action (Dehumidifying)", "Increasing Chilled Water Valve position by 10%"),
+])
+def test_execute_branches(prebuilt_engine, mock_processed_data, method, reasons, expected_event, expected_substring):
+    """
+    Tests the primary action of each branch (A: dilution VAV, B: cooling,
+    C: warming, D: dehumidifying). The four cases share their structure, so
+    one parametrized test on the prebuilt engine covers them all.
+    """
+    engine = prebuilt_engine
+    engine._reset_runtime_state()
+    engine.sensor_states["047"] = _SensorState()
     ts = mock_processed_data["iaq"]["datetime"][0]
-    engine._execute_branch_a(ts, "047", mock_processed_data, ["tvoc"])
+    data_index = engine._build_data_index(mock_processed_data)
+    ts_key = next(iter(data_index["ahu"]))
+    getattr(engine, method)(ts, "047", data_index, reasons, ts_key)
     log = engine.log_records[-1]
-    assert log["event"] == "VAV Action"
-    assert "airflow not at max" in log["details"]
+    assert log["event"] == expected_event
+    assert expected_substring in log["details"]
 
-def test_execute_branch_a_pad_not_at_max(base_config, mock_processed_data):
+def test_execute_branch_a_pad_not_at_max(prebuilt_engine, mock_processed_data):
     """Tests the second action of Branch A (increasing PAD) if VAV is already at max."""
-    engine = IAQLogicEngine(base_config)
-    engine.sensor_states["047"] = {"dilution_cycle_count": 0}
+    engine = prebuilt_engine
+    engine._reset_runtime_state()
+    engine.sensor_states["047"] = _SensorState()
     ts = mock_processed_data["iaq"]["datetime"][0]
     # Modify VAV data to be at max
-    mock_processed_data["vav"] = mock_processed_data["vav"].with_columns(pl.col("supflosp").map_elements(lambda x: 1000))
-    engine._execute_branch_a(ts, "047", mock_processed_data, ["tvoc"])
+    mock_processed_data["vav"] = mock_processed_data["vav"].with_columns(supflosp=pl.lit(1000, dtype=pl.Int64))
+    data_index = engine._build_data_index(mock_processed_data)
+    ts_key = next(iter(data_index["ahu"]))
+    engine._execute_branch_a(ts, "047", data_index, ["tvoc"], ts_key)
     log = engine.log_records[-1]
     assert log["event"] == "PAD Action"
     assert "Increasing opening by 5%" in log["details"]
 
-def test_execute_branch_b_cooling(base_config, mock_processed_data):
-    """Tests the action of Branch B (Cooling)."""
-    engine = IAQLogicEngine(base_config)
-    engine.sensor_states["047"] = {"dilution_cycle_count": 0}
-    ts = mock_processed_data["iaq"]["datetime"][0]
-    engine._execute_branch_b(ts, "047", mock_processed_data, ["temp"])
-    log = engine.log_records[-1]
-    assert log["event"] == "VAV Action (Cooling)"
-    assert "Increasing flow setpoint by 10%" in log["details"]
-
-def test_execute_branch_c_warming(base_config, mock_processed_data):
-    """Tests the action of Branch C (Warming)."""
-    engine = IAQLogicEngine(base_config)
-    engine.sensor_states["047"] = {"dilution_cycle_count": 0}
-    ts = mock_processed_data["iaq"]["datetime"][0]
-    engine._execute_branch_c(ts, "047", mock_processed_data, ["temp"])
-    log = engine.log_records[-1]
-    assert log["event"] == "VAV Action (Warming)"
-    assert "Decreasing flow setpoint by 10%" in log["details"]
-
-def test_execute_branch_d_dehumid(base_config, mock_processed_data):
-    """Tests the action of Branch D (Dehumid)."""
-    engine = IAQLogicEngine(base_config)
-    engine.sensor_states["047"] = {"dilution_cycle_count": 0}
-    ts = mock_processed_data["iaq"]["datetime"][0]
-    engine._execute_branch_d(ts, "047", mock_processed_data, ["rh"])
-    log = engine.log_records[-1]
-    assert log["event"] == "CHW Valve Action (Dehumidifying)"
-    assert "Increasing Chilled Water Valve position by 10%" in log["details"]
-
-@pytest.mark.parametrize("reasons, temp, rh, expected_branch_method", [
-    (["co2", "tvoc"], 24, 60, "_execute_branch_a"), # Pollutant
-    (["temp"], 28, 60, "_execute_branch_b"),        # Hot
-    (["temp"], 22, 60, "_execute_branch_c"),        # Cold
-    (["rh"], 24, 75, "_execute_branch_d"),          # Humid
-])
-def test_handle_persistent_alert_routing(base_config, mock_processed_data, mocker, reasons, temp, rh, expected_branch_method):
+class TestHandlePersistentAlertRouting:
     """
     Tests the main router function (_handle_persistent_alert) to ensure it calls
-    the correct branch method based on the trigger reasons. It uses `mocker` to "spy"
-    on the branch methods and confirm they were called.
-    """
-    mocker.patch(f"src.logic_engine.IAQLogicEngine.{expected_branch_method}")
-    engine = IAQLogicEngine(base_config)
-    ts = datetime.now()
-    sensor_id = "047"
-    engine.sensor_states[sensor_id] = {}
-    sensor_data = {"temperature": temp, "humidity": rh}
-    engine._handle_persistent_alert(ts, sensor_id, sensor_data, reasons, mock_processed_data)
-    spy = getattr(engine, expected_branch_method)
-    spy.assert_called_once()
-    assert f"Routing to Branch {expected_branch_method[-1].upper()}" in engine.log_records[-1]["details"]
-
-def test_run_simulation_full_cycle(base_config, monkeypatch):
+    the correct branch method based on the trigger reasons. All four branch
+    methods are patched once per case by the autouse fixture, so each case
+    resolves the attribute paths a single time and can also assert the other
+    branches stayed untouched.
     """
-    An integration test for a complete alert cycle: trigger, persistence,
-    action (Branch A), and finally normalization.
+
+    _BRANCH_METHODS = ("_execute_branch_a", "_execute_branch_b", "_execute_branch_c", "_execute_branch_d")
+
+    @pytest.fixture(autouse=True)
+    def _patch_all_branches(self, mocker):
+        self.spies = {
+            method: mocker.patch(f"src.logic_engine.IAQLogicEngine.{method}")
+            for method in self._BRANCH_METHODS
+        }
+
+    @pytest.mark.parametrize("reasons, temp, rh, expected_branch_method", [
+        (["co2", "tvoc"], 24, 60, "_execute_branch_a"), # Pollutant
+        (["temp"], 28, 60, "_execute_branch_b"),        # Hot
+        (["temp"], 22, 60, "_execute_branch_c"),        # Cold
+        (["rh"], 24, 75, "_execute_branch_d"),          # Humid
+    ])
+    def test_routes_to_expected_branch(self, prebuilt_engine, mock_processed_data, reasons, temp, rh, expected_branch_method):
+        engine = prebuilt_engine
+        engine._reset_runtime_state()
+        ts = FIXED_TS
+        sensor_id = "047"
+        engine.sensor_states[sensor_id] = _SensorState()
+        sensor_data = {"temperature": temp, "humidity": rh}
+        engine._handle_persistent_alert(ts, sensor_id, sensor_data, reasons, engine._build_data_index(mock_processed_data))
+        self.spies[expected_branch_method].assert_called_once()
+        for method, spy in self.spies.items():
+            if method != expected_branch_method:
+                spy.assert_not_called()
+        assert f"Routing to Branch {expected_branch_method[-1].upper()}" in engine.log_records[-1]["details"]
+
+@pytest.fixture(scope="module")
+def simulation_mock_data(mock_config_path):
     """
-    monkeypatch.setattr("src.logic_engine.fetch_psi_data", lambda date=None: pl.DataFrame())
-    engine = IAQLogicEngine(base_config)
-    persistence_min = base_config["thresholds"]["triggering"]["persistence_minutes"]
+    A module-scoped alert-cycle dataset (trigger -> persist -> action ->
+    normalize) shared by the run_simulation tests. Built once with explicit
+    schemas so each test skips both the Python-list conversion and dtype
+    inference; run_simulation never mutates its input frames.
+    """
+    from src.config import load_config
+    persistence_min = load_config(mock_config_path)["thresholds"]["triggering"]["persistence_minutes"]
     timestamps = [datetime(2025, 1, 1, 12, i) for i in range(persistence_min + 2)]
     tvoc_readings = [600] * (persistence_min + 1) + [300]
-    mock_data = {
-        "iaq": pl.DataFrame({"datetime": timestamps, "sensor_id": ["047"]*len(timestamps), "tvoc": tvoc_readings}),
-        "vav": pl.DataFrame({"datetime": timestamps, "vav_id": ["vav_01"]*len(timestamps), "cmaxflo": [1000]*len(timestamps), "supflosp": [500]*len(timestamps)}),
-        "ahu": pl.DataFrame({"datetime": timestamps})
+    count = len(timestamps)
+    return {
+        "iaq": pl.DataFrame(
+            {"datetime": timestamps, "sensor_id": ["047"]*count, "tvoc": tvoc_readings},
+            schema={"datetime": pl.Datetime, "sensor_id": pl.String, "tvoc": pl.Int64}),
+        "vav": pl.DataFrame(
+            {"datetime": timestamps, "vav_id": ["vav_01"]*count, "cmaxflo": [1000]*count, "supflosp": [500]*count},
+            schema={"datetime": pl.Datetime, "vav_id": pl.String, "cmaxflo": pl.Int64, "supflosp": pl.Int64}),
+        "ahu": pl.DataFrame({"datetime": timestamps}, schema={"datetime": pl.Datetime})
     }
-    event_logs, _ = engine.run_simulation(mock_data)
+
+def test_run_simulation_full_cycle(base_config_frozen, simulation_mock_data):
+    """
+    An integration test for a complete alert cycle: trigger, persistence,
+    action (Branch A), and finally normalization.
+    """
+    engine = IAQLogicEngine(base_config_frozen, psi_fetcher=lambda psi_url, date=None: pl.DataFrame())
+    event_logs, _ = engine.run_simulation(simulation_mock_data)
     log_events = [log["event"] for log in event_logs]
     assert "Branch Routing" in log_events
     assert "VAV Action" in log_events
     assert "Normalization" in log_events
-    assert not engine.sensor_states["047"]["is_triggered"]
+    assert not engine.sensor_states["047"].is_triggered
 
-def test_run_simulation_generates_correct_detailed_log(base_config, monkeypatch):
+def test_run_simulation_generates_correct_detailed_log(base_config_frozen, simulation_mock_data):
     """
     Tests the detailed_log output from run_simulation to ensure it correctly
     captures the minute-by-minute state changes of a sensor.
     """
-    monkeypatch.setattr("src.logic_engine.fetch_psi_data", lambda date=None: pl.DataFrame())
-    engine = IAQLogicEngine(base_config)
-    persistence_min = base_config["thresholds"]["triggering"]["persistence_minutes"] # This is 2 mins
-    # We'll simulate 4 minutes: Trigger -> Persist -> Action -> Normalize
-    timestamps = [datetime(2025, 1, 1, 12, i) for i in range(persistence_min + 2)]
-    # TVOC is high for 3 mins, then normalizes in the 4th min
-    tvoc_readings = [600] * (persistence_min + 1) + [300]
-    mock_data = {
-        "iaq": pl.DataFrame({"datetime": timestamps, "sensor_id": ["047"]*len(timestamps), "tvoc": tvoc_readings}),
-        "vav": pl.DataFrame({"datetime": timestamps, "vav_id": ["vav_01"]*len(timestamps), "cmaxflo": [1000]*len(timestamps), "supflosp": [500]*len(timestamps)}),
-        "ahu": pl.DataFrame({"datetime": timestamps})
-    }
-    _, detailed_log = engine.run_simulation(mock_data)
-    detailed_df = pl.DataFrame(detailed_log)
+    engine = IAQLogicEngine(base_config_frozen, psi_fetcher=lambda psi_url, date=None: pl.DataFrame())
+    persistence_min = base_config_frozen["thresholds"]["triggering"]["persistence_minutes"]
+    _, detailed_log = engine.run_simulation(simulation_mock_data)
+    # Explicit schema skips per-row key discovery and doubles as a regression
+    # check that run_simulation emits a stable record layout.
+    detailed_df = pl.from_dicts(detailed_log, schema={
+        "timestamp": pl.Datetime, "sensor_id": pl.String,
+        "is_triggered": pl.Boolean, "has_fired": pl.Boolean,
+        "alert_type": pl.String, "dilution_cycle": pl.Int64,
+        "temperature": pl.Float64, "co2": pl.Float64, "humidity": pl.Float64,
+        "tvoc": pl.Int64, "pm2_5": pl.Float64,
+    })
     # Check that the log has an entry for every timestamp
-    assert detailed_df.shape[0] == len(timestamps)
+    assert detailed_df.shape[0] == simulation_mock_data["iaq"].height
     # Check the state at the initial trigger (minute 0)
     # is_triggered should be True, but has_fired should be False
     first_state = detailed_df.row(0, named=True)
@@ -206,18 +227,17 @@ def test_run_simulation_generates_correct_detailed_log(base_config, monkeypatch)
     assert final_state["alert_type"] is None
     assert final_state["dilution_cycle"] == 0
 
-def test_psi_mapping_haze_mode(base_config, caplog, monkeypatch):
+def test_psi_mapping_haze_mode(base_config_frozen, caplog):
     """
     Tests the PSI logic by mocking the API call to return an "Unhealthy" reading.
     """
     caplog.set_level(logging.INFO)
-    monkeypatch.setattr("src.logic_engine.fetch_psi_data",
-        lambda date=None: pl.DataFrame({"metric": ["psi_twenty_four_hourly"], "central": [150]}))
-    engine = IAQLogicEngine(base_config)
+    engine = IAQLogicEngine(base_config_frozen,
+        psi_fetcher=lambda psi_url, date=None: pl.DataFrame({"metric": ["psi_twenty_four_hourly"], "central": [150]}))
     mock_data = {
-        "iaq": pl.DataFrame({"datetime": [datetime.now()], "sensor_id": ["psi_test"]}),
+        "iaq": pl.DataFrame({"datetime": [FIXED_TS], "sensor_id": ["psi_test"]}),
         "vav": pl.DataFrame(),
-        "ahu": pl.DataFrame({"datetime": [datetime.now()]})
+        "ahu": pl.DataFrame({"datetime": [FIXED_TS]})
     }
     engine.run_simulation(mock_data)
     assert "PSI is Unhealthy. Haze Mode Protocol triggered" in caplog.text
\ No newline at end of file
@@ -1,33 +1,56 @@
 # Import Libraries
 from datetime import datetime
-from src.reports_writer import generate_event_reports, generate_detailed_simulation_log
+from polars.testing import assert_frame_equal
+from src.reports_writer import _build_event_df, generate_event_reports, generate_detailed_simulation_log
 import polars as pl
+import pytest
 
-def test_generate_event_reports_creates_files(tmp_path):
+@pytest.fixture(scope="module")
+def reports_tmp_root(tmp_path_factory):
     """
-    Tests that generate_event_reports successfully creates the event log
-    and summary CSV files with the correct content.
+    One temporary parent directory for the happy-path write tests, so each
+    test only creates its own subdirectory instead of a full per-test
+    tmp_path. The empty-input tests keep function-scoped tmp_path because
+    they assert the output directory is never created.
     """
-    output_dir = tmp_path / "reports"
-    run_timestamp = "2025-10-01_12-00-00"
-    event_records = [
-        {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "047", "event": "Dilution Cycle Started", "details": "...", "reasons": "['tvoc']", "dilution_cycle": 1},
-        {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "048", "event": "Cooling Cycle Started", "details": "...", "reasons": "['temp']", "dilution_cycle": 1},
-        {"timestamp": datetime(2025, 10, 1, 10, 11), "sensor_id": "047", "event": "Normalization", "details": "...", "reasons": "[]", "dilution_cycle": 0},
-    ]
-    generate_event_reports(event_records, output_dir, run_timestamp)
-    event_log_path = output_dir / f"event_log_{run_timestamp}.csv"
-    summary_path = output_dir / f"summary_report_{run_timestamp}.csv"
-    assert event_log_path.exists()
-    assert summary_path.exists()
-    events_df = pl.read_csv(event_log_path, schema_overrides={"sensor_id": pl.String})
+    return tmp_path_factory.mktemp("reports_root")
+
+EVENT_RECORDS = [
+    {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "047", "event": "Dilution Cycle Started", "details": "...", "reasons": "['tvoc']", "dilution_cycle": 1},
+    {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "048", "event": "Cooling Cycle Started", "details": "...", "reasons": "['temp']", "dilution_cycle": 1},
+    {"timestamp": datetime(2025, 10, 1, 10, 11), "sensor_id": "047", "event": "Normalization", "details": "...", "reasons": "[]", "dilution_cycle": 0},
+]
+
+def test_build_event_df_contents():
+    """
+    Tests the event log and summary contents in memory, without the CSV
+    encode/parse round trip.
+    """
+    events_df = _build_event_df(EVENT_RECORDS)
     assert events_df.shape == (3, 6)
-    summary_df = pl.read_csv(summary_path, schema_overrides={"sensor_id": pl.String})
-    assert summary_df.shape == (3, 3) # 3 unique sensor_id/event pairs
-    count_val = summary_df.filter(
-        (pl.col("sensor_id") == "047") & (pl.col("event") == "Normalization")
-    ).select("len").item()
-    assert count_val == 1
+    summary_df = events_df.group_by(["sensor_id", "event"]).len()
+    # One frame comparison instead of chained filter/select/item probes;
+    # dtypes are relaxed since group_by().len() yields a UInt32 count.
+    assert_frame_equal(
+        summary_df.sort(["sensor_id", "event"]),
+        pl.DataFrame({
+            "sensor_id": ["047", "047", "048"],
+            "event": ["Dilution Cycle Started", "Normalization", "Cooling Cycle Started"],
+            "len": [1, 1, 1],
+        }).sort(["sensor_id", "event"]),
+        check_dtypes=False,
+    )
+
+def test_generate_event_reports_creates_files(reports_tmp_root, request):
+    """
+    Tests that generate_event_reports actually writes the event log and
+    summary files to disk; their contents are covered in memory above.
+    """
+    output_dir = reports_tmp_root / request.node.name
+    run_timestamp = "2025-10-01_12-00-00"
+    generate_event_reports(EVENT_RECORDS, output_dir, run_timestamp)
+    assert (output_dir / f"event_log_{run_timestamp}.csv").exists()
+    assert (output_dir / f"summary_report_{run_timestamp}.csv").exists()
 
 def test_generate_event_reports_skips_on_empty(tmp_path, caplog):
     """
@@ -40,12 +63,12 @@ def test_generate_event_reports_skips_on_empty(tmp_path, caplog):
     assert not output_dir.exists()
     assert "No event records were generated. Skipping event report creation." in caplog.text
 
-def test_generate_detailed_log_creates_file(tmp_path):
+def test_generate_detailed_log_creates_file(reports_tmp_root, request):
     """
     Tests that generate_detailed_simulation_log successfully creates the
     detailed timestamp-by-timestamp CSV file.
     """
-    output_dir = tmp_path / "reports"
+    output_dir = reports_tmp_root / request.node.name
     run_timestamp = "2025-10-01_12-00-00"
     detailed_records = [
         {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "047", "is_triggered": True, "has_fired": False, "alert_type": "pollutant", "dilution_cycle": 0, "temperature": 24.5, "co2": 850},
@@ -59,6 +82,24 @@ def test_generate_detailed_log_creates_file(tmp_path):
     assert detailed_df.shape == (3, 8)
     assert detailed_df.filter(pl.col("dilution_cycle") == 1).select("co2").item() == 800
 
+def test_generate_detailed_log_parquet_format(reports_tmp_root, request):
+    """
+    Tests that the optional parquet format writes a .parquet file with the
+    same rows the CSV path would contain.
+    """
+    output_dir = reports_tmp_root / request.node.name
+    run_timestamp = "2025-10-01_12-00-00"
+    detailed_records = [
+        {"timestamp": datetime(2025, 10, 1, 10, 10), "sensor_id": "047", "is_triggered": True, "has_fired": False, "alert_type": "pollutant", "dilution_cycle": 0, "temperature": 24.5, "co2": 850},
+        {"timestamp": datetime(2025, 10, 1, 10, 11), "sensor_id": "047", "is_triggered": False, "has_fired": False, "alert_type": None, "dilution_cycle": 0, "temperature": 24.1, "co2": 650},
+    ]
+    generate_detailed_simulation_log(detailed_records, output_dir, run_timestamp, file_format="parquet")
+    detailed_log_path = output_dir / f"detailed_simulation_log_{run_timestamp}.parquet"
+    assert detailed_log_path.exists()
+    detailed_df = pl.read_parquet(detailed_log_path)
+    assert detailed_df.shape == (2, 8)
+    assert detailed_df["co2"].to_list() == [850, 650]
+
 def test_generate_detailed_log_skips_on_empty(tmp_path, caplog):
     """
     Tests that generate_detailed_simulation_log does not create a file and